@@ -12,9 +12,41 @@ Date:
 
 
 from ._utils import *
+from ._metric import *
+from ._model_output import *
+from ._model_output_file import *
+from ._profiler import *
+from ._eviction_policy import *
 from ._cache import *
 from ._numpy_array_cache import *
+from ._object_cache import *
+from ._memmap_array_cache import *
+from ._memmap_dict_cache import *
+from ._cache_stats import *
 from ._cached_function import *
+from ._persistent_cached_function import *
+from ._batch_cached_function import *
+from ._shared_cached_function import *
+from ._derivative_cached_function import *
+from ._taylor_cached_function import *
+from ._symmetric_cached_function import *
 from ._model import *
-from . import catalysis
-from . import diffusion
+from ._finite_difference_model import *
+
+
+# The forward models pull in scipy.integrate and fipy, so they are imported
+# the first time they are used (PEP 562)
+_LAZY_SUBMODULES = ('advection', 'benchmarks', 'catalysis', 'diffusion')
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        import importlib
+        # Importing the submodule also sets it as an attribute
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute '
+                         + repr(name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_SUBMODULES))
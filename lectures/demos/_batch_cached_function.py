@@ -0,0 +1,155 @@
+"""
+A cached function that is evaluated on many inputs at once.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['BatchCachedFunction']
+
+
+import time
+import numpy as np
+from . import regularize_array
+from . import nbytes_of
+from . import ModelOutput
+from . import CachedFunction
+
+
+def _row(v, j):
+    """
+    Return a copy of row ``j`` of ``v`` (``None`` if there is none).
+    """
+    if v is None or v[j] is None:
+        return None
+    return np.array(v[j])
+
+
+def _split(y, n):
+    """
+    Split the output ``y`` of a function evaluated on ``n`` points to a list
+    of the outputs of each point.
+
+    ``y`` is either an array whose rows correspond to the points or a
+    dictionary of such arrays (or lists) or a :class:`vuq.ModelOutput`. The
+    outputs are copies, so that a cached point does not keep the arrays of
+    the whole batch alive.
+    """
+    if isinstance(y, (dict, ModelOutput)):
+        return [dict((key, _row(v, j)) for key, v in y.items())
+                for j in range(n)]
+    return [_row(y, j) for j in range(n)]
+
+
+def _allocate_like(y, n):
+    """
+    Preallocate ``n`` rows for outputs that look like ``y`` (one point).
+    """
+    if isinstance(y, dict):
+        return dict((key, _allocate_like(v, n)) for key, v in y.items())
+    if y is None:
+        return [None] * n
+    y = np.asarray(y)
+    return np.empty((n, ) + y.shape, dtype=y.dtype)
+
+
+def _assign(out, j, y):
+    """
+    Write the output ``y`` of one point to row ``j`` of ``out``.
+    """
+    if isinstance(out, dict):
+        for key in out:
+            _assign(out[key], j, y[key])
+    else:
+        out[j] = y
+
+
+def _take(out, rows):
+    """
+    Return the rows ``rows`` of ``out``.
+    """
+    if isinstance(out, dict):
+        return dict((key, _take(v, rows)) for key, v in out.items())
+    if isinstance(out, list):
+        return [out[j] for j in rows]
+    return out[rows]
+
+
+class BatchCachedFunction(CachedFunction):
+
+    """
+    A cached function of a ``num_points x num_input`` array.
+
+    A call with an array ``x`` works as follows:
+
+        + The repeated rows of ``x`` are removed.
+        + All the unique rows are looked up in the input cache in one pass.
+        + The function is called once, on the submatrix of the rows that were
+          not found.
+        + Every unique row goes to a preallocated output, which is then
+          scattered back to the rows of ``x``.
+
+    The underlying function must accept a 2D array and return either an
+    array whose rows correspond to the rows of its input or a dictionary of
+    such arrays (or lists), e.g., :meth:`vuq.Model.__call__()`. The output of
+    each row is cached separately. Lists in the output come out as arrays.
+
+    Batches are thread-safe, but the rows of concurrent batches are not
+    deduplicated against each other.
+
+    See :class:`vuq.CachedFunction` for the parameters.
+    """
+
+    def __call__(self, x, *args, **kw):
+        """
+        Call the function at all the rows of ``x``.
+        """
+        x = regularize_array(np.asarray(x))
+        if x.shape[0] == 0:
+            # Nothing to look up, but the function knows the shape of its
+            # output
+            return self._f(x, *args, **kw)
+        u, inverse = np.unique(x, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        values = [None] * u.shape[0]
+        with self._lock:
+            t0 = time.perf_counter()
+            idx = self._input_cache.get_indices_of(u)
+            self._stats.record_lookup(time.perf_counter() - t0)
+            self._count += x.shape[0]
+            hits = np.flatnonzero(idx != -1)
+            misses = np.flatnonzero(idx == -1)
+            # Read the hits before appending anything, it may evict them
+            for j in hits:
+                values[j] = self._output_cache[int(idx[j])]
+        if misses.shape[0] > 0:
+            t0 = time.perf_counter()
+            y = self._f(u[misses], *args, **kw)
+            cost = (time.perf_counter() - t0) / misses.shape[0]
+            with self._lock:
+                self._count_eval += misses.shape[0]
+                for j, yj in zip(misses, _split(y, misses.shape[0])):
+                    values[j] = yj
+                    i = self._input_cache.append(
+                        u[j], cost=cost, nbytes=nbytes_of(u[j]) + nbytes_of(yj))
+                    if i != -1:
+                        self._output_cache[i] = yj
+                    self._stats.record_miss(i, cost)
+                    idx[j] = i
+        # Every row that was not evaluated is a hit
+        with self._lock:
+            counts = np.bincount(inverse, minlength=u.shape[0])
+            counts[misses] -= 1
+            for j in np.flatnonzero(counts):
+                for _ in range(counts[j]):
+                    if idx[j] == -1:
+                        # Too large to be cached, but still a repeated row
+                        self._stats.hits += 1
+                    else:
+                        self._stats.record_hit(int(idx[j]))
+        out = _allocate_like(values[0], u.shape[0])
+        for j in range(u.shape[0]):
+            _assign(out, j, values[j])
+        return _take(out, inverse)
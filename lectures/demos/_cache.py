@@ -13,15 +13,65 @@ Date:
 __all__ = ['Cache']
 
 
+import numpy as np
+from . import make_eviction_policy
+from . import nbytes_of
+
+
 class Cache(object):
 
     """
     A generic class representing a cache.
+
+    The entries of the cache live in ``max_size`` preallocated slots. The
+    index of an entry is its slot and it does not change for as long as the
+    entry stays in the cache. When the cache is full, the eviction policy
+    picks the entry to drop and its slot is reused. With the default
+    ``'fifo'`` policy the slots are used as a ring buffer.
+
+    The cache may also be bounded by the total number of bytes of its
+    entries (``max_bytes``). The size of each entry is measured with
+    :func:`vuq.nbytes_of()` unless it is given to :meth:`append()`. The
+    policy evicts entries until the new one fits. In this case, ``max_size``
+    is just the number of slots and it may be set generously.
+
+    The children must implement the storage, i.e., :meth:`_set_value_at()`,
+    :meth:`_get_value_at()` and :meth:`_clear_at()`, as well as
+    :meth:`_do_get_index_of()`.
+
+    :param policy:      The eviction policy. See
+                        :func:`vuq.make_eviction_policy()`.
+    :param max_bytes:   The maximum number of bytes (``None`` for no limit).
     """
 
     # The maximum size of the cache
     _max_size = None
 
+    # The maximum number of bytes of the cache
+    _max_bytes = None
+
+    # The eviction policy
+    _policy = None
+
+    # Is each slot occupied?
+    _occupied = None
+
+    # A stack of free slots (may contain slots that have been occupied since)
+    _free = None
+
+    # The number of entries in the cache
+    _size = None
+
+    # The number of bytes of the entry in each slot and their sum
+    _slot_nbytes = None
+    _nbytes = None
+
+    # The number of entries evicted so far
+    _num_evicted = None
+
+    # Caches whose slots follow the slots of this one
+    _followers = None
+
     # A name for the object
     __name__ = None
 
@@ -32,13 +82,38 @@ class Cache(object):
         """
         return self._max_size
 
-    def __init__(self, max_size=256, name='Cache'):
+    @property
+    def max_bytes(self):
+        """
+        :getter:    The maximum number of bytes (``None`` for no limit).
+        """
+        return self._max_bytes
+
+    @property
+    def policy(self):
+        """
+        :getter:    The eviction policy.
+        """
+        return self._policy
+
+    def __init__(self, max_size=256, name='Cache', policy='fifo',
+                 max_bytes=None):
         """
         Initialize the object.
         """
         assert isinstance(max_size, int)
         assert max_size > 0
+        assert max_bytes is None or max_bytes > 0
         self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._policy = make_eviction_policy(policy)
+        self._occupied = np.zeros(max_size, dtype=bool)
+        self._free = list(range(max_size - 1, -1, -1))
+        self._size = 0
+        self._slot_nbytes = np.zeros(max_size, dtype=np.int64)
+        self._nbytes = 0
+        self._num_evicted = 0
+        self._followers = []
         self.__name__ = name
 
     @property
@@ -46,44 +121,212 @@ class Cache(object):
         """
         Is the cache empty?
         """
-        return self.size == None
+        return self.size == 0
 
     @property
     def size(self):
         """
         :getter:    The current size of the cache.
         """
-        raise NotImplementedError('Implement me!')
+        return self._size
+
+    @property
+    def nbytes(self):
+        """
+        :getter:    The number of bytes of the entries.
+        """
+        return self._nbytes
+
+    @property
+    def num_evicted(self):
+        """
+        :getter:    The number of entries evicted so far.
+        """
+        return self._num_evicted
+
+    @property
+    def occupied_slots(self):
+        """
+        :getter:    The slots that hold an entry.
+        """
+        return np.flatnonzero(self._occupied)
+
+    def follow(self, leader):
+        """
+        Make the slots of this cache follow the slots of ``leader``.
+
+        Whenever an entry of ``leader`` is dropped, the entry of this cache
+        in the same slot is dropped too. The entries are stored with
+        :meth:`__setitem__()`.
+        """
+        assert self.max_size >= leader.max_size
+        leader._followers.append(self)
+
+    def drop_at(self, i):
+        """
+        Drop the value stored at slot ``i``.
+        """
+        assert i >= 0 and i < self.max_size and self._occupied[i]
+        self._policy.remove(i)
+        self._clear_at(i)
+        self._occupied[i] = False
+        self._free.append(i)
+        self._size -= 1
+        self._nbytes -= int(self._slot_nbytes[i])
+        self._slot_nbytes[i] = 0
+        for c in self._followers:
+            if c._occupied[i]:
+                c.drop_at(i)
 
     def drop_one(self):
         """
-        Drops one value from the cache assuming that there is at least one
-        element.
+        Drops the value chosen by the eviction policy assuming that there is
+        at least one element.
+
+        :returns:   The slot that was freed.
+        """
+        assert self.size > 0
+        i = self._policy.victim()
+        self.drop_at(i)
+        self._num_evicted += 1
+        return i
+
+    def _set_value_at(self, i, value):
+        """
+        Store ``value`` at the free slot ``i``.
         """
         raise NotImplementedError('Implement me!')
 
-    def _do_append(self, value):
+    def _clear_at(self, i):
         """
-        Adds ``value`` to the cache assuming the maximum size has not been
-        reached.
+        Forget the value stored at slot ``i``.
         """
         raise NotImplementedError('Implement me!')
 
-    def append(self, value):
+    def _pop_free(self):
+        """
+        Return a free slot and mark it as occupied.
+        """
+        i = self._free.pop()
+        while self._occupied[i]:
+            i = self._free.pop()
+        self._occupied[i] = True
+        self._size += 1
+        return i
+
+    def _account(self, i, nbytes):
+        """
+        Set the number of bytes of the entry at slot ``i``.
+        """
+        self._nbytes += nbytes - int(self._slot_nbytes[i])
+        self._slot_nbytes[i] = nbytes
+
+    def _policy_nbytes(self, nbytes):
+        """
+        The size passed to the policy (only if there is a byte budget).
+        """
+        return None if self.max_bytes is None else nbytes
+
+    def _restore_at(self, i, cost=None, nbytes=0):
+        """
+        Register an entry that is already stored at slot ``i``, e.g., one
+        that was loaded from disk.
+        """
+        assert not self._occupied[i]
+        self._occupied[i] = True
+        self._size += 1
+        self._account(i, nbytes)
+        self._policy.insert(i, cost, self._policy_nbytes(nbytes))
+
+    def append(self, value, cost=None, nbytes=None):
         """
         Adds ``value`` to the cache.
+
+        :param cost:    The cost of computing ``value`` (used by the eviction
+                        policy).
+        :param nbytes:  The number of bytes to account for ``value``. If
+                        ``None``, it is measured.
+        :returns:       The slot in which ``value`` was stored or -1 if it
+                        is larger than ``max_bytes``.
         """
+        if nbytes is None:
+            nbytes = nbytes_of(value)
+        if self.max_bytes is not None:
+            if nbytes > self.max_bytes:
+                return -1
+            while self.nbytes + nbytes > self.max_bytes:
+                self.drop_one()
         if self.size == self.max_size:
             self.drop_one()
-        self._do_append(value)
+        i = self._pop_free()
+        try:
+            self._set_value_at(i, value)
+        except BaseException:
+            # Give the slot back
+            self._occupied[i] = False
+            self._size -= 1
+            self._free.append(i)
+            raise
+        self._account(i, nbytes)
+        self._policy.insert(i, cost, self._policy_nbytes(nbytes))
+        return i
+
+    def __setitem__(self, i, value):
+        """
+        Store ``value`` at slot ``i`` replacing whatever is there.
+
+        This bypasses the eviction policy. It is meant for caches that hold
+        data associated with the entries of another cache, e.g., the outputs
+        of a :class:`vuq.CachedFunction`, and must use the same slots. See
+        :meth:`follow()`.
+        """
+        assert i >= 0 and i < self.max_size
+        if self._occupied[i]:
+            self._clear_at(i)
+            self._occupied[i] = False
+            self._size -= 1
+            self._account(i, 0)
+        # The slot is occupied only if the value was stored
+        self._set_value_at(i, value)
+        self._occupied[i] = True
+        self._size += 1
+        self._account(i, nbytes_of(value))
+
+    def _do_get_index_of(self, value):
+        """
+        Return the index of ``value`` or -1 if it is not in the cache.
+        """
+        raise NotImplementedError('Implement me!')
 
     def get_index_of(self, value):
         """
         Return the index of ``value``.
 
-        It should return -1 if ``value`` is not stored in the cashe.
+        It should return -1 if ``value`` is not stored in the cashe. A value
+        that is found counts as a hit for the eviction policy.
         """
-        raise NotImplementedError('Implement me!')
+        i = self._do_get_index_of(value)
+        if i != -1:
+            self._policy.touch(i)
+        return i
+
+    def _do_get_indices_of(self, values):
+        """
+        Return the indices of each one of ``values`` (-1 if not in the cache).
+
+        The children may override this to look up all values in one go.
+        """
+        return np.array([self._do_get_index_of(v) for v in values], dtype=int)
+
+    def get_indices_of(self, values):
+        """
+        Return the indices of each one of ``values`` (e.g., the rows of a 2D
+        array) as an array. Not found values get -1.
+        """
+        idx = self._do_get_indices_of(values)
+        for i in idx[idx != -1]:
+            self._policy.touch(int(i))
+        return idx
 
     def _get_value_at(self, i):
         """
@@ -95,7 +338,7 @@ class Cache(object):
         """
         Return the value of the cashe stored at index ``i``.
         """
-        assert i >= 0 and i < self.size
+        assert i >= 0 and i < self.max_size and self._occupied[i]
         return self._get_value_at(i)
 
     def __str__(self):
@@ -0,0 +1,167 @@
+"""
+Statistics of a cached function.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['LatencyHistogram', 'CacheStats']
+
+
+import numpy as np
+
+
+class LatencyHistogram(object):
+
+    """
+    A histogram of times with logarithmically spaced bins.
+
+    :param low:     The smallest bin edge (in seconds).
+    :param high:    The largest bin edge (in seconds).
+    :param bins_per_decade: The number of bins per order of magnitude.
+    """
+
+    def __init__(self, low=1e-7, high=1e4, bins_per_decade=4):
+        """
+        Initialize the object.
+        """
+        num_decades = np.log10(high) - np.log10(low)
+        self._edges = np.logspace(np.log10(low), np.log10(high),
+                                  int(round(num_decades * bins_per_decade)) + 1)
+        # The first and the last bins catch everything outside the edges
+        self._counts = np.zeros(self._edges.shape[0] + 1, dtype=np.int64)
+        self._total = 0.
+        self._min = np.inf
+        self._max = 0.
+
+    @property
+    def count(self):
+        """
+        :getter:    The number of recorded times.
+        """
+        return int(self._counts.sum())
+
+    @property
+    def total(self):
+        """
+        :getter:    The sum of the recorded times.
+        """
+        return self._total
+
+    def add(self, t):
+        """
+        Record the time ``t``.
+        """
+        self._counts[np.searchsorted(self._edges, t, side='right')] += 1
+        self._total += t
+        self._min = min(self._min, t)
+        self._max = max(self._max, t)
+
+    def to_dict(self):
+        """
+        Return the histogram as a dictionary.
+
+        The bin ``i`` of ``counts`` holds the times between ``edges[i - 1]``
+        and ``edges[i]``. The first and the last bins hold the times outside
+        the edges.
+        """
+        count = self.count
+        return {'count': count,
+                'total': self._total,
+                'mean': self._total / count if count > 0 else None,
+                'min': self._min if count > 0 else None,
+                'max': self._max if count > 0 else None,
+                'edges': self._edges.tolist(),
+                'counts': self._counts.tolist()}
+
+
+class CacheStats(object):
+
+    """
+    The statistics of a :class:`vuq.CachedFunction`.
+
+    It counts the hits, the misses, the calls that waited for a pending
+    evaluation and the calls answered with an approximation. It keeps
+    histograms of the lookup and evaluation times. It also keeps the
+    evaluation cost and the number of hits of the entry in each slot of the
+    cache, and the evaluation time saved by the hits.
+
+    :param max_size:    The number of slots of the cache.
+    """
+
+    def __init__(self, max_size):
+        """
+        Initialize the object.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.approx_hits = 0
+        self.time_saved = 0.
+        self.lookup_time = LatencyHistogram()
+        self.eval_time = LatencyHistogram()
+        self.slot_cost = np.zeros(max_size)
+        self.slot_hits = np.zeros(max_size, dtype=np.int64)
+
+    def record_lookup(self, t):
+        """
+        Record a lookup that took ``t`` seconds.
+        """
+        self.lookup_time.add(t)
+
+    def record_hit(self, i):
+        """
+        Record a hit of the entry at slot ``i``.
+        """
+        self.hits += 1
+        self.slot_hits[i] += 1
+        self.time_saved += self.slot_cost[i]
+
+    def record_wait(self):
+        """
+        Record a call that waited for a pending evaluation.
+        """
+        self.waits += 1
+
+    def record_approx(self):
+        """
+        Record a call that was answered with an approximation.
+        """
+        self.approx_hits += 1
+
+    def record_miss(self, i, cost):
+        """
+        Record an evaluation that took ``cost`` seconds and was stored at
+        slot ``i`` (-1 if it was not stored).
+        """
+        self.misses += 1
+        self.eval_time.add(cost)
+        if i != -1:
+            self.slot_cost[i] = cost
+            self.slot_hits[i] = 0
+
+    def record_update(self, i, cost):
+        """
+        Record an evaluation that took ``cost`` seconds and added to the
+        entry at slot ``i``.
+        """
+        self.misses += 1
+        self.eval_time.add(cost)
+        self.slot_cost[i] += cost
+
+    def to_dict(self):
+        """
+        Return the counters and the histograms as a dictionary.
+        """
+        calls = self.hits + self.misses + self.waits + self.approx_hits
+        return {'calls': calls,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'approx_hits': self.approx_hits,
+                'hit_rate': (self.hits + self.waits) / calls if calls > 0 else None,
+                'lookup_time': self.lookup_time.to_dict(),
+                'eval_time': self.eval_time.to_dict(),
+                'time_saved': float(self.time_saved)}
@@ -13,14 +13,78 @@ Date:
 __all__ = ['CachedFunction']
 
 
+import time
+import json
+import asyncio
+import weakref
+import functools
+import threading
+from concurrent.futures import Future
+import numpy as np
 from . import Cache
 from . import NumpyArrayCache
+from . import ObjectCache
+from . import CacheStats
+from . import nbytes_of
+from ._numpy_array_cache import _array_key
+
+
+def _weak_method(f, obj):
+    """
+    Bind the function ``f`` to ``obj`` without keeping ``obj`` alive.
+    """
+    ref = weakref.ref(obj)
+
+    @functools.wraps(f)
+    def method(*args, **kw):
+        return f(ref(), *args, **kw)
+
+    return method
+
+
+def _order_of(kw):
+    """
+    Return the order of derivatives asked for by a call with keyword
+    arguments ``kw`` (see :meth:`vuq.Model._eval()`).
+    """
+    return int(kw.get('order', 2))
 
 
 class CachedFunction(object):
 
     """
     A class representing a cached function.
+
+    The eviction policy of the input cache decides which entries are
+    dropped, e.g., ``input_cache_args={'policy': 'lru'}``. The output cache
+    just follows the slots of the input cache. With the ``'cost'`` policy,
+    the cost of an entry is the time it took to evaluate the function.
+
+    The size of an entry is the number of bytes of the input plus those of
+    the output. So, a byte budget on the input cache, e.g.,
+    ``input_cache_args={'max_bytes': 2 ** 30, 'max_size': 10 ** 6}``, bounds
+    the memory taken by the evaluations.
+
+    The object can be called from many threads or asyncio tasks at once. If
+    an input is being evaluated when another call asks for it (an input with
+    the same bytes), the second call waits for the pending result instead of
+    evaluating the function again. Use :meth:`submit()` to get a
+    :class:`concurrent.futures.Future` and :meth:`acall()` to get an
+    awaitable.
+
+    The hits, misses, evictions, lookup and evaluation times, memory taken
+    and the cost of each cached evaluation are available through
+    :meth:`get_stats()` and :meth:`dump_stats()`.
+
+    The object can decorate methods. Each instance of the class gets its
+    own cached function (made with the arguments of the decorator) the
+    first time the method is accessed and keeps it for as long as it lives.
+
+    Like :meth:`vuq.Model._eval()`, the function may take the order of
+    derivatives to compute as the keyword argument ``order`` (2 if it is not
+    given). An entry is a hit only for calls that ask for at most the order
+    it was computed at. Otherwise, the function is evaluated again and the
+    entry is replaced.
     """
 
     # The input cache
@@ -35,10 +99,40 @@ class CachedFunction(object):
     # The object that implements the function (if any)
     _obj = None
 
+    # Protects the caches and the pending evaluations
+    _lock = None
+
+    # The futures of the evaluations in progress (by input key)
+    _pending = None
+
+    # The statistics
+    _stats = None
+
+    # The order of derivatives of the entry in each slot
+    _orders = None
+
+    # The arguments the object was made with (except the function)
+    _init_args = None
+
+    # The cached functions of the instances of a class (for methods)
+    _instances = None
+
+    def __new__(cls, *args, **kw):
+        self = super(CachedFunction, cls).__new__(cls)
+        # Remember how the object was made without the function (which may
+        # be passed by keyword), see __get__()
+        if 'f' in kw:
+            kw = dict(kw)
+            del kw['f']
+            self._init_args = (args, kw)
+        else:
+            self._init_args = (args[1:], kw)
+        return self
+
     def __init__(self, f,
                  input_cache_type=NumpyArrayCache,
                  input_cache_args={'name': 'Input Cache'},
-                 output_cache_type=NumpyArrayCache,
+                 output_cache_type=ObjectCache,
                  output_cache_args={'name': 'Output Cache'}):
         """
         Initialize the object.
@@ -47,35 +141,222 @@ class CachedFunction(object):
         self._count_eval = 0
         self._f = f
         self._input_cache = input_cache_type(**input_cache_args)
+        output_cache_args = dict(output_cache_args)
+        output_cache_args.setdefault('max_size', self._input_cache.max_size)
         self._output_cache = output_cache_type(**output_cache_args)
+        self._output_cache.follow(self._input_cache)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stats = CacheStats(self._input_cache.max_size)
+        self._orders = np.zeros(self._input_cache.max_size, dtype=np.int8)
+        self._instances = weakref.WeakKeyDictionary()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        del state['_pending']
+        del state['_instances']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._instances = weakref.WeakKeyDictionary()
 
     def __get__(self, obj, type=None):
-        return self.__class__(self._f.__get__(obj, type))
+        """
+        Return the cached function of the instance ``obj``.
+        """
+        if obj is None:
+            return self
+        with self._lock:
+            try:
+                cf = self._instances.get(obj)
+            except TypeError:
+                raise TypeError('A CachedFunction can only decorate methods '
+                                'of objects that can be weakly referenced.')
+            if cf is None:
+                args, kw = self._init_args
+                cf = self.__class__(_weak_method(self._f, obj), *args, **kw)
+                self._instances[obj] = cf
+        return cf
 
-    def __call__(self, *args, **kw):
+    @staticmethod
+    def _pending_key(x, order):
         """
-        Call the function at x.
+        Return the key of the pending evaluation of ``x`` at ``order``
+        (``None`` if ``x`` cannot be indexed).
         """
-        x = args[0]
-        # Look for x in the cache
-        i = self._input_cache.get_index_of(x)
-        self._count += 1
-        if i == -1:
-            # Not found in cache, so evaluate
-            y = self._f(*args, **kw)
+        key = _array_key(np.asarray(x))
+        return None if key is None else (key, order)
+
+    def _begin(self, x, order=2):
+        """
+        Look for ``x`` at ``order`` in the cache or in the pending
+        evaluations.
+
+        :returns:   A tuple ``(y, future, owner)``. If ``x`` is in the cache,
+                    ``y`` is its output and ``future`` is ``None``.
+                    Otherwise, ``future`` will hold the output and ``owner``
+                    is ``True`` if the caller must evaluate the function and
+                    pass the result to :meth:`_finish()` or :meth:`_fail()`.
+        """
+        key = self._pending_key(x, order)
+        with self._lock:
+            self._count += 1
+            # Look for x in the cache
+            t0 = time.perf_counter()
+            i = self._input_cache.get_index_of(x)
+            self._stats.record_lookup(time.perf_counter() - t0)
+            if i != -1:
+                if self._orders[i] >= order:
+                    # Found in cache, recover
+                    self._stats.record_hit(i)
+                    return self._output_cache[i], None, False
+                # Computed at a lower order, it will be replaced
+                self._input_cache.drop_at(i)
+            if key is not None and key in self._pending:
+                self._stats.record_wait()
+                return None, self._pending[key], False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            if key is not None:
+                self._pending[key] = future
+            return None, future, True
+
+    def _finish(self, x, future, y, cost, order=2):
+        """
+        Store the output ``y`` of ``x`` at ``order`` and resolve its pending
+        evaluation.
+        """
+        with self._lock:
             self._count_eval += 1
-            self._input_cache.append(x)
-            self._output_cache.append(y)
-        else:
-            # Found in cache, recover
-            y = self._output_cache[i]
+            i = self._input_cache.append(x, cost=cost,
+                                         nbytes=nbytes_of(x) + nbytes_of(y))
+            if i != -1:
+                self._orders[i] = order
+                try:
+                    self._output_cache[i] = y
+                except BaseException:
+                    # Never keep an input without its output
+                    self._input_cache.drop_at(i)
+                    raise
+            self._stats.record_miss(i, cost)
+            self._pending.pop(self._pending_key(x, order), None)
+        future.set_result(y)
+
+    def _fail(self, x, future, e, order=2):
+        """
+        Resolve the pending evaluation of ``x`` at ``order`` with the
+        exception ``e``.
+        """
+        with self._lock:
+            self._pending.pop(self._pending_key(x, order), None)
+        future.set_exception(e)
+
+    def _evaluate(self, future, args, kw):
+        """
+        Evaluate the function as the owner of ``future``.
+        """
+        order = _order_of(kw)
+        t0 = time.perf_counter()
+        try:
+            y = self._f(*args, **kw)
+            self._finish(args[0], future, y, time.perf_counter() - t0,
+                         order=order)
+        except BaseException as e:
+            self._fail(args[0], future, e, order=order)
+            raise
         return y
-    
+
+    def __call__(self, *args, **kw):
+        """
+        Call the function at x.
+        """
+        y, future, owner = self._begin(args[0], _order_of(kw))
+        if future is None:
+            return y
+        if not owner:
+            return future.result()
+        return self._evaluate(future, args, kw)
+
+    def submit(self, executor, *args, **kw):
+        """
+        Call the function at x using ``executor`` if it must be evaluated.
+
+        :param executor:    A :class:`concurrent.futures.Executor`.
+        :returns:           A :class:`concurrent.futures.Future`.
+        """
+        y, future, owner = self._begin(args[0], _order_of(kw))
+        if future is None:
+            future = Future()
+            future.set_result(y)
+        elif owner:
+            executor.submit(self._evaluate, future, args, kw)
+        return future
+
+    async def acall(self, *args, executor=None, **kw):
+        """
+        Call the function at x without blocking the event loop.
+
+        The function is evaluated by ``executor`` (the default executor of
+        the loop if ``None``).
+        """
+        y, future, owner = self._begin(args[0], _order_of(kw))
+        if future is None:
+            return y
+        if owner:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, self._evaluate,
+                                              future, args, kw)
+        # Cancelling this call must not cancel the other waiters
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def get_stats(self, entries=False):
+        """
+        Return the statistics of the cached function as a dictionary.
+
+        :param entries: If ``True``, include the input, the evaluation cost
+                        and the number of hits of every cached entry.
+        """
+        with self._lock:
+            stats = self._stats.to_dict()
+            stats['evictions'] = self._input_cache.num_evicted
+            stats['size'] = self._input_cache.size
+            stats['max_size'] = self._input_cache.max_size
+            stats['nbytes'] = int(self._input_cache.nbytes)
+            stats['max_bytes'] = self._input_cache.max_bytes
+            if entries:
+                stats['entries'] = [
+                    {'input': np.asarray(self._input_cache[i]).tolist(),
+                     'cost': float(self._stats.slot_cost[i]),
+                     'hits': int(self._stats.slot_hits[i])}
+                    for i in self._input_cache.occupied_slots]
+        return stats
+
+    def dump_stats(self, filename=None, entries=False, **kw):
+        """
+        Return the statistics as a JSON string and, optionally, write them to
+        ``filename``.
+
+        The rest of the keyword arguments are passed to :func:`json.dumps()`.
+        """
+        s = json.dumps(self.get_stats(entries=entries), **kw)
+        if filename is not None:
+            with open(filename, 'w') as fd:
+                fd.write(s)
+        return s
+
     def __str__(self):
         """
         Return a string representation of the object.
         """
+        stats = self.get_stats()
         s = 'Cached function:\n'
-        s = ('Evaluations = ' + str(self._count) +
-             ' (' + str(self._count_eval) + ' actual)')
+        s += ('Evaluations = ' + str(self._count) +
+              ' (' + str(self._count_eval) + ' actual)\n')
+        s += ('Hits = ' + str(stats['hits']) + ', misses = '
+              + str(stats['misses']) + ', evictions = '
+              + str(stats['evictions']))
         return s
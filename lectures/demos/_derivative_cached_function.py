@@ -0,0 +1,241 @@
+"""
+A cached function that stores each derivative order separately.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['DERIVATIVE_KEYS', 'DerivativeCachedFunction']
+
+
+import time
+import asyncio
+from concurrent.futures import Future
+import numpy as np
+from . import nbytes_of
+from . import CachedFunction
+from ._numpy_array_cache import _array_key
+
+
+# The key of each derivative order in the outputs of a model
+DERIVATIVE_KEYS = ('f', 'f_grad', 'f_grad_2')
+
+
+def _regularize_orders(orders):
+    """
+    Turn ``orders`` (an int or an iterable of ints) to a sorted tuple.
+    """
+    if isinstance(orders, (int, np.integer)):
+        orders = (orders, )
+    orders = tuple(sorted(set(int(k) for k in orders)))
+    for k in orders:
+        assert k >= 0 and k < len(DERIVATIVE_KEYS)
+    return orders
+
+
+class DerivativeCachedFunction(CachedFunction):
+
+    """
+    A cached function whose output is a dictionary of derivatives.
+
+    The entry of an input holds the derivative orders computed so far, i.e.,
+    some of the keys ``f`` (order 0), ``f_grad`` (order 1) and ``f_grad_2``
+    (order 2). A call asks for some orders. If the entry holds all of them,
+    it is a hit. Otherwise, the function is called for the missing orders
+    only and the results are added to the entry. So, asking for ``f`` at
+    many points and then for the Hessian at a few of them, evaluates ``f``
+    once per point.
+
+    The underlying function is called as ``f(x, orders, *args, **kw)``,
+    where ``orders`` is a tuple of the missing orders. It must return a
+    dictionary with (at least) the keys of these orders. Any other keys it
+    returns are cached as well. For example, a model that cannot compute the
+    orders separately may return all of them.
+
+    The outputs are stored in a :class:`vuq.ObjectCache`. The size of an
+    entry is updated when orders are added to it, but the byte budget of the
+    input cache (if any) is enforced only when a new entry is appended.
+
+    See :class:`vuq.CachedFunction` for the parameters.
+    """
+
+    @staticmethod
+    def _pending_key(x, orders):
+        """
+        Return the key of the pending evaluation of ``x`` (``None`` if ``x``
+        cannot be indexed). There is at most one per input, whatever its
+        orders.
+        """
+        return _array_key(np.asarray(x))
+
+    def _lookup(self, x, orders):
+        """
+        Look for the orders ``orders`` of ``x`` in the cache or in the pending
+        evaluations.
+
+        If ``x`` is being evaluated, the caller waits for that evaluation even
+        if it computes other orders. It then looks again and computes only the
+        orders that are still missing. So, no order is computed twice.
+
+        :returns:   A tuple ``(y, future, owner, missing)``. If the entry of
+                    ``x`` holds all the orders, ``y`` is the entry and
+                    ``future`` is ``None``. Otherwise, ``future`` will hold
+                    the updated entry, ``missing`` are the orders that must
+                    be computed and ``owner`` is ``True`` if the caller must
+                    compute them.
+        """
+        key = self._pending_key(x, orders)
+        with self._lock:
+            self._count += 1
+            t0 = time.perf_counter()
+            i = self._input_cache.get_index_of(x)
+            self._stats.record_lookup(time.perf_counter() - t0)
+            y = self._output_cache[i] if i != -1 else {}
+            missing = tuple(k for k in orders if not self._has(y, (k, )))
+            if len(missing) == 0:
+                self._stats.record_hit(i)
+                return y, None, False, missing
+            if key is not None and key in self._pending:
+                self._stats.record_wait()
+                return None, self._pending[key], False, missing
+            future = Future()
+            future.set_running_or_notify_cancel()
+            if key is not None:
+                self._pending[key] = future
+            return None, future, True, missing
+
+    def _store(self, x, missing, future, y, cost):
+        """
+        Add the orders ``y`` of ``x`` to its entry and resolve the pending
+        evaluation.
+        """
+        with self._lock:
+            self._count_eval += 1
+            i = self._input_cache.get_index_of(x)
+            is_new = i == -1
+            if is_new:
+                y = dict(y)
+                i = self._input_cache.append(
+                    x, cost=cost, nbytes=nbytes_of(x) + nbytes_of(y))
+            else:
+                # Do not modify the entry in place, callers may hold it. The
+                # orders that were not computed (None) keep their values.
+                new = y
+                y = dict(self._output_cache[i])
+                for k, v in new.items():
+                    if v is not None or k not in y:
+                        y[k] = v
+            if i != -1:
+                try:
+                    self._output_cache[i] = y
+                except BaseException:
+                    # Never keep an input without its output
+                    self._input_cache.drop_at(i)
+                    raise
+            if is_new:
+                self._stats.record_miss(i, cost)
+            else:
+                self._input_cache._account(i, nbytes_of(x) + nbytes_of(y))
+                self._stats.record_update(i, cost)
+            self._pending.pop(self._pending_key(x, missing), None)
+        future.set_result(y)
+        return y
+
+    def _compute(self, future, x, missing, args, kw):
+        """
+        Compute the orders ``missing`` of ``x`` as the owner of ``future``.
+        """
+        t0 = time.perf_counter()
+        try:
+            y = self._f(x, missing, *args, **kw)
+            return self._store(x, missing, future, y,
+                               time.perf_counter() - t0)
+        except BaseException as e:
+            self._fail(x, future, e, missing)
+            raise
+
+    @staticmethod
+    def _has(y, orders):
+        """
+        Does the entry ``y`` hold the orders ``orders``? An order whose
+        value is ``None`` is missing.
+        """
+        return all(y.get(DERIVATIVE_KEYS[k]) is not None for k in orders)
+
+    @staticmethod
+    def _select(y, orders):
+        """
+        Return the orders ``orders`` of the entry ``y``.
+        """
+        return dict((DERIVATIVE_KEYS[k], y[DERIVATIVE_KEYS[k]]) for k in orders)
+
+    def __call__(self, x, orders=(0, 1, 2), *args, **kw):
+        """
+        Return the orders ``orders`` of the function at ``x``.
+
+        :param orders:  An order or an iterable of orders.
+        :returns:       A dictionary with the keys of ``orders``.
+        """
+        orders = _regularize_orders(orders)
+        while True:
+            y, future, owner, missing = self._lookup(x, orders)
+            if future is None:
+                return self._select(y, orders)
+            if owner:
+                return self._select(self._compute(future, x, missing, args, kw),
+                                    orders)
+            y = future.result()
+            # The entry was evicted while the missing orders were computed
+            if self._has(y, orders):
+                return self._select(y, orders)
+
+    def submit(self, executor, x, orders=(0, 1, 2), *args, **kw):
+        """
+        Return the orders ``orders`` of the function at ``x`` using
+        ``executor`` if they must be computed.
+
+        :param executor:    A :class:`concurrent.futures.Executor`.
+        :returns:           A :class:`concurrent.futures.Future`.
+        """
+        orders = _regularize_orders(orders)
+        y, future, owner, missing = self._lookup(x, orders)
+        result = Future()
+        if future is None:
+            result.set_result(self._select(y, orders))
+            return result
+        if owner:
+            executor.submit(self._compute, future, x, missing, args, kw)
+
+        def done(future):
+            if future.exception() is not None:
+                result.set_exception(future.exception())
+            elif self._has(future.result(), orders):
+                result.set_result(self._select(future.result(), orders))
+            else:
+                # The entry was evicted while the missing orders were computed
+                result.set_result(self(x, orders, *args, **kw))
+
+        future.add_done_callback(done)
+        return result
+
+    async def acall(self, x, orders=(0, 1, 2), *args, executor=None, **kw):
+        """
+        Return the orders ``orders`` of the function at ``x`` without blocking
+        the event loop.
+        """
+        orders = _regularize_orders(orders)
+        y, future, owner, missing = self._lookup(x, orders)
+        if future is None:
+            return self._select(y, orders)
+        if owner:
+            loop = asyncio.get_running_loop()
+            y = await loop.run_in_executor(executor, self._compute,
+                                           future, x, missing, args, kw)
+        else:
+            y = await asyncio.shield(asyncio.wrap_future(future))
+        if not self._has(y, orders):
+            # The entry was evicted while the missing orders were computed
+            return await self.acall(x, orders, *args, executor=executor, **kw)
+        return self._select(y, orders)
@@ -0,0 +1,247 @@
+"""
+Policies that decide which entry of a cache is evicted.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['EvictionPolicy', 'FIFOPolicy', 'LRUPolicy', 'LFUPolicy',
+           'CostAwarePolicy', 'make_eviction_policy']
+
+
+import heapq
+import itertools
+from collections import OrderedDict
+
+
+class EvictionPolicy(object):
+
+    """
+    A generic class representing an eviction policy.
+
+    The policy knows nothing about the values stored in a cache. It is told
+    which slots are filled, hit or cleared and, when the cache is full, it
+    picks the slot that should be evicted.
+    """
+
+    # A name for the object
+    __name__ = None
+
+    def __init__(self, name='Eviction Policy'):
+        """
+        Initialize the object.
+        """
+        self.__name__ = name
+
+    def insert(self, i, cost=None, nbytes=None):
+        """
+        A new entry was stored at slot ``i``.
+
+        :param cost:    The cost of computing the entry (e.g., in seconds).
+                        ``None`` if unknown.
+        :param nbytes:  The size of the entry if the cache has a byte budget.
+        """
+        raise NotImplementedError('Implement me!')
+
+    def touch(self, i):
+        """
+        The entry at slot ``i`` was hit.
+        """
+        raise NotImplementedError('Implement me!')
+
+    def remove(self, i):
+        """
+        The entry at slot ``i`` was removed from the cache.
+
+        Removing a slot that the policy does not know about does nothing.
+        """
+        raise NotImplementedError('Implement me!')
+
+    def victim(self):
+        """
+        Return the slot of the entry that should be evicted next.
+        """
+        raise NotImplementedError('Implement me!')
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        return 'Name: ' + self.__name__
+
+
+class FIFOPolicy(EvictionPolicy):
+
+    """
+    Evict the oldest entry.
+    """
+
+    # The slots in the order they were filled
+    _order = None
+
+    def __init__(self, name='FIFO Policy'):
+        """
+        Initialize the object.
+        """
+        super(FIFOPolicy, self).__init__(name=name)
+        self._order = OrderedDict()
+
+    def insert(self, i, cost=None, nbytes=None):
+        self._order[i] = None
+
+    def touch(self, i):
+        pass
+
+    def remove(self, i):
+        self._order.pop(i, None)
+
+    def victim(self):
+        return next(iter(self._order))
+
+
+class LRUPolicy(FIFOPolicy):
+
+    """
+    Evict the least recently used entry.
+    """
+
+    def __init__(self, name='LRU Policy'):
+        """
+        Initialize the object.
+        """
+        super(LRUPolicy, self).__init__(name=name)
+
+    def touch(self, i):
+        self._order.move_to_end(i)
+
+
+class _HeapPolicy(EvictionPolicy):
+
+    """
+    A policy that evicts the entry with the smallest priority.
+
+    The priorities live in a heap with lazy deletion, i.e., stale heap
+    entries are skipped when looking for the victim.
+    """
+
+    # The current priority of each slot
+    _priority = None
+
+    # The heap of (priority, tie breaker, slot)
+    _heap = None
+
+    def __init__(self, name):
+        """
+        Initialize the object.
+        """
+        super(_HeapPolicy, self).__init__(name=name)
+        self._priority = {}
+        self._heap = []
+        self._counter = itertools.count()
+
+    def _set_priority(self, i, p):
+        self._priority[i] = p
+        heapq.heappush(self._heap, (p, next(self._counter), i))
+        if len(self._heap) > 4 * len(self._priority) + 64:
+            self._heap = [(q, next(self._counter), j)
+                          for j, q in self._priority.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, i):
+        self._priority.pop(i, None)
+
+    def victim(self):
+        while True:
+            p, _, i = self._heap[0]
+            if self._priority.get(i) == p:
+                return i
+            heapq.heappop(self._heap)
+
+
+class LFUPolicy(_HeapPolicy):
+
+    """
+    Evict the least frequently used entry (the least recent one among ties).
+    """
+
+    def __init__(self, name='LFU Policy'):
+        """
+        Initialize the object.
+        """
+        super(LFUPolicy, self).__init__(name=name)
+
+    def insert(self, i, cost=None, nbytes=None):
+        self._set_priority(i, 1)
+
+    def touch(self, i):
+        self._set_priority(i, self._priority[i] + 1)
+
+
+class CostAwarePolicy(_HeapPolicy):
+
+    """
+    Evict the entry that is cheapest to recompute (GreedyDual).
+
+    Each entry gets the priority ``L + cost`` when it is inserted or hit,
+    where ``L`` is the priority of the last evicted entry. So, expensive
+    entries outlive cheap ones, but entries that are not used anymore age
+    and are eventually evicted no matter how expensive they are. If the
+    cache has a byte budget, the cost per byte is used instead of the cost
+    (GreedyDual-Size).
+
+    :param default_cost:    The cost of entries inserted without one.
+    """
+
+    def __init__(self, default_cost=0., name='Cost Aware Policy'):
+        """
+        Initialize the object.
+        """
+        super(CostAwarePolicy, self).__init__(name=name)
+        self._default_cost = default_cost
+        self._cost = {}
+        self._inflation = 0.
+
+    def insert(self, i, cost=None, nbytes=None):
+        if cost is None:
+            cost = self._default_cost
+        if nbytes is not None:
+            cost /= max(nbytes, 1)
+        self._cost[i] = float(cost)
+        self._set_priority(i, self._inflation + self._cost[i])
+
+    def touch(self, i):
+        self._set_priority(i, self._inflation + self._cost[i])
+
+    def remove(self, i):
+        super(CostAwarePolicy, self).remove(i)
+        self._cost.pop(i, None)
+
+    def victim(self):
+        i = super(CostAwarePolicy, self).victim()
+        self._inflation = self._priority[i]
+        return i
+
+
+# The policies that can be selected by name
+_POLICIES = {'fifo': FIFOPolicy,
+             'lru': LRUPolicy,
+             'lfu': LFUPolicy,
+             'cost': CostAwarePolicy}
+
+
+def make_eviction_policy(policy):
+    """
+    Make an eviction policy.
+
+    :param policy:  An :class:`vuq.EvictionPolicy`, a subclass of it or one of
+                    ``'fifo'``, ``'lru'``, ``'lfu'`` and ``'cost'``.
+    """
+    if isinstance(policy, EvictionPolicy):
+        return policy
+    if isinstance(policy, type) and issubclass(policy, EvictionPolicy):
+        return policy()
+    if policy not in _POLICIES:
+        raise ValueError('Unknown eviction policy: ' + str(policy))
+    return _POLICIES[policy]()
@@ -0,0 +1,260 @@
+"""
+A model whose derivatives are computed with finite differences.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['FiniteDifferenceModel']
+
+
+import functools
+import numpy as np
+from . import call_many
+from . import Model
+
+
+class FiniteDifferenceModel(Model):
+
+    """
+    Computes the Jacobian and the Hessian of any :class:`vuq.Model` with
+    finite differences.
+
+    For all the inputs at which the model is called, all the perturbed
+    points (the stencil) are made at once and the underlying model is
+    evaluated at them in a single batch, i.e., in parallel if ``executor``
+    is given and with :meth:`vuq.Model._eval_batch()` if the model has it.
+    With enough workers, the wall-clock time is close to that of one
+    evaluation. The output at the unperturbed input is part of the batch and
+    it is also used by the differences.
+
+    The schemes are (``n`` is the number of inputs):
+
+        + ``'forward'``:    ``n + 1`` points for the Jacobian, ``n (n + 1) / 2``
+                            more for the Hessian.
+        + ``'central'``:    ``2 n + 1`` points for the Jacobian, ``2 n (n - 1)``
+                            more for the Hessian.
+        + ``'complex'``:    The complex step. ``n`` points for the Jacobian,
+                            which is exact to machine precision, and ``2 n^2``
+                            for the Hessian (a complex step and a real central
+                            difference). The underlying model must accept
+                            complex inputs and propagate them analytically
+                            (e.g., not through ``abs()`` or a solver that
+                            works with real numbers only).
+
+    The default steps are ``eps ** p * max(|x_i|, 1)``, where ``p`` is the
+    optimal exponent of the scheme and of the highest order of derivatives
+    requested (e.g., ``1 / 3`` for the central Jacobian and ``1 / 4`` for the
+    central Hessian). The errors of models solved to a tolerance (e.g.,
+    ODEs or PDEs) are divided by the steps, so such models may need larger
+    steps ``h`` or a tighter tolerance.
+
+    :param model:       The underlying model. Only its outputs are used.
+    :param scheme:      ``'forward'``, ``'central'`` or ``'complex'``.
+    :param h:           The real steps (a number or one per input). If
+                        ``None``, the default steps are used.
+    :param executor:    Evaluates the stencil, see :func:`vuq.call_many()`.
+    :param num_workers: The number of workers of the executor.
+    """
+
+    # The underlying model
+    _model = None
+
+    # The finite difference scheme
+    _scheme = None
+
+    # The real steps (None for the default ones)
+    _h = None
+
+    # Evaluates the stencil
+    _executor = None
+
+    # The number of workers of the executor
+    _num_workers = None
+
+    # The step of the imaginary part (relative)
+    _COMPLEX_STEP = 1e-20
+
+    # The exponents of the default steps by scheme and order
+    _STEP_EXPONENTS = {'forward': {1: 1. / 2., 2: 1. / 3.},
+                       'central': {1: 1. / 3., 2: 1. / 4.},
+                       'complex': {1: 1. / 3., 2: 1. / 3.}}
+
+    @property
+    def model(self):
+        """
+        :getter:    The underlying model.
+        """
+        return self._model
+
+    @property
+    def scheme(self):
+        """
+        :getter:    The finite difference scheme.
+        """
+        return self._scheme
+
+    def __init__(self, model, scheme='central', h=None, executor=None,
+                 num_workers=None, name=None):
+        """
+        Initialize the object.
+        """
+        if scheme not in self._STEP_EXPONENTS:
+            raise ValueError('Unknown scheme: ' + str(scheme))
+        if name is None:
+            name = 'Finite Differences of ' + str(model.__name__)
+        super(FiniteDifferenceModel, self).__init__(model.num_input,
+                                                    model.num_output,
+                                                    name=name)
+        self._model = model
+        self._scheme = scheme
+        self._h = None if h is None else np.asarray(h, dtype=float)
+        self._executor = executor
+        self._num_workers = num_workers
+
+    def _steps(self, X, order):
+        """
+        Return the real steps of each row of ``X``.
+        """
+        if self._h is not None:
+            h = np.broadcast_to(self._h, X.shape)
+        else:
+            p = self._STEP_EXPONENTS[self._scheme][order]
+            h = np.finfo(float).eps ** p * np.maximum(np.abs(X), 1.)
+        # Make the steps exactly representable
+        return (X + h) - X
+
+    def _offsets(self, order):
+        """
+        Return the offsets of the stencil in units of the real steps (``A``)
+        and of the imaginary steps (``B``), two arrays of
+        num_points x num_input.
+        """
+        n = self.num_input
+        E = np.eye(n)
+        if order == 0:
+            return np.zeros((1, n)), np.zeros((1, n))
+        if self._scheme == 'forward':
+            A = [np.zeros((1, n)), E]
+            if order >= 2:
+                i, j = np.triu_indices(n)
+                A.append(E[i] + E[j])
+            A = np.vstack(A)
+            return A, np.zeros_like(A)
+        if self._scheme == 'central':
+            A = [np.zeros((1, n)), E, -E]
+            if order >= 2:
+                i, j = np.triu_indices(n, 1)
+                A += [E[i] + E[j], E[i] - E[j], -E[i] + E[j], -E[i] - E[j]]
+            A = np.vstack(A)
+            return A, np.zeros_like(A)
+        # The complex step: x + i h e_j for the Jacobian and
+        # x + i h e_j +/- d e_k for the Hessian
+        A = [np.zeros((n, n))]
+        B = [E]
+        if order >= 2:
+            j, k = np.divmod(np.arange(n * n), n)
+            A += [E[k], -E[k]]
+            B += [E[j], E[j]]
+        return np.vstack(A), np.vstack(B)
+
+    def _eval_f(self, P):
+        """
+        Evaluate the outputs of the underlying model at the rows of ``P``.
+        """
+        model = self._model
+        if not np.iscomplexobj(P):
+            return model(P, order=0, executor=self._executor,
+                         num_workers=self._num_workers)['f']
+        # ModelOutput holds real numbers, so complex outputs are collected
+        # directly
+        if model.has_eval_batch:
+            return np.asarray(model._eval_batch(P, order=0)['f'])
+        ys = call_many(P, functools.partial(model._eval_profiled, order=0),
+                       return_numpy=False, executor=self._executor,
+                       num_workers=self._num_workers)
+        return np.array([y['f'] for y in ys])
+
+    def _eval_batch(self, X, order=2):
+        """
+        Evaluate the model and its derivatives at the rows of ``X`` with one
+        batch of evaluations of the underlying model.
+        """
+        m, n = X.shape
+        A, B = self._offsets(order)
+        k = A.shape[0]
+        h = self._steps(X, max(order, 1))
+        P = X[:, None, :] + A[None, :, :] * h[:, None, :]
+        if self._scheme == 'complex' and order >= 1:
+            hc = self._COMPLEX_STEP * np.maximum(np.abs(X), 1.)
+            P = P + 1j * B[None, :, :] * hc[:, None, :]
+        F = self._eval_f(P.reshape((m * k, n)))
+        F = F.reshape((m, k, -1))
+        state = {'f_grad': None, 'f_grad_2': None}
+        if order == 0:
+            state['f'] = F[:, 0].real
+            return state
+        if self._scheme == 'forward':
+            state['f'] = F[:, 0]
+            Fi = F[:, 1:n + 1]
+            state['f_grad'] = np.swapaxes((Fi - F[:, :1]) / h[:, :, None],
+                                          1, 2)
+            if order >= 2:
+                i, j = np.triu_indices(n)
+                Fij = F[:, n + 1:]
+                d2 = ((Fij - Fi[:, i] - Fi[:, j] + F[:, :1])
+                      / (h[:, i] * h[:, j])[:, :, None])
+                state['f_grad_2'] = self._symmetric(d2, i, j)
+        elif self._scheme == 'central':
+            state['f'] = F[:, 0]
+            Fp = F[:, 1:n + 1]
+            Fm = F[:, n + 1:2 * n + 1]
+            state['f_grad'] = np.swapaxes((Fp - Fm) / (2. * h[:, :, None]),
+                                          1, 2)
+            if order >= 2:
+                i, j = np.triu_indices(n, 1)
+                Fpp, Fpm, Fmp, Fmm = np.split(F[:, 2 * n + 1:], 4, axis=1)
+                off = ((Fpp - Fpm - Fmp + Fmm)
+                       / (4. * h[:, i] * h[:, j])[:, :, None])
+                diag = (Fp - 2. * F[:, :1] + Fm) / (h ** 2)[:, :, None]
+                ii = np.arange(n)
+                d2 = np.concatenate([diag, off], axis=1)
+                state['f_grad_2'] = self._symmetric(
+                    d2, np.concatenate([ii, i]), np.concatenate([ii, j]))
+        else:
+            # The real part is the output up to O(h^2) = O(1e-40)
+            state['f'] = F[:, 0].real
+            state['f_grad'] = np.swapaxes(F[:, :n].imag / hc[:, :, None],
+                                          1, 2)
+            if order >= 2:
+                j, k = np.divmod(np.arange(n * n), n)
+                Fp = F[:, n:n + n * n]
+                Fm = F[:, n + n * n:]
+                d2 = ((Fp - Fm).imag
+                      / (2. * hc[:, j] * h[:, k])[:, :, None])
+                d2 = np.swapaxes(d2, 1, 2).reshape((m, -1, n, n))
+                state['f_grad_2'] = 0.5 * (d2 + np.swapaxes(d2, 2, 3))
+        return state
+
+    @staticmethod
+    def _symmetric(d2, i, j):
+        """
+        Make the Hessians (num_points x num_output x n x n) out of the
+        entries ``d2[:, p, :]`` at ``(i[p], j[p])`` of their upper triangles.
+        """
+        m, _, q = d2.shape
+        n = max(i.max(), j.max()) + 1
+        H = np.empty((m, q, n, n))
+        H[:, :, i, j] = np.swapaxes(d2, 1, 2)
+        H[:, :, j, i] = np.swapaxes(d2, 1, 2)
+        return H
+
+    def _eval(self, x, order=2):
+        """
+        Evaluate the model and its derivatives at ``x``.
+        """
+        state = self._eval_batch(np.asarray(x).reshape((1, -1)), order=order)
+        return dict((key, None if v is None else v[0])
+                    for key, v in state.items())
@@ -0,0 +1,125 @@
+"""
+A numpy array cache that lives on the disk.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['MemmapArrayCache']
+
+
+import os
+import json
+import numpy as np
+from numpy.lib.format import open_memmap
+from . import NumpyArrayCache
+from ._numpy_array_cache import _array_key
+
+
+class MemmapArrayCache(NumpyArrayCache):
+
+    """
+    A :class:`vuq.NumpyArrayCache` whose storage is memory-mapped to files.
+
+    The cache uses the following files:
+
+        + ``filename + '.npy'``:        The entries (one row per slot).
+        + ``filename + '.stamps.npy'``: The index, i.e., the order in which
+                                        the entries were appended (-1 for free
+                                        slots).
+        + ``filename + '.json'``:       The shape of the entries.
+
+    If the files exist, the cache is loaded from them. The hash index and the
+    state of the eviction policy are rebuilt by replaying the entries in the
+    order they were appended (the costs of the entries are not stored and
+    each entry accounts only for the bytes of its input).
+
+    See :class:`vuq.NumpyArrayCache` for the rest of the parameters.
+
+    :param filename:    The prefix of the files.
+    """
+
+    # The prefix of the files
+    _filename = None
+
+    @property
+    def filename(self):
+        """
+        :getter:    The prefix of the files.
+        """
+        return self._filename
+
+    def __init__(self, filename, max_size=256, name='Memmap Array Cache',
+                 **kwargs):
+        """
+        Initialize the object.
+        """
+        super(MemmapArrayCache, self).__init__(max_size=max_size, name=name,
+                                               **kwargs)
+        self._filename = filename
+        stamps_file = filename + '.stamps.npy'
+        if os.path.exists(stamps_file):
+            self._stamps = open_memmap(stamps_file, mode='r+')
+            if self._stamps.shape[0] != max_size:
+                raise ValueError('The cache in ' + filename + ' has max_size '
+                                 + str(self._stamps.shape[0]) + '.')
+            self._load()
+        else:
+            self._stamps = open_memmap(stamps_file, mode='w+', dtype=np.int64,
+                                       shape=(max_size, ))
+            self._stamps[:] = -1
+
+    def _load(self):
+        """
+        Load the entries stored on the disk.
+        """
+        slots = np.flatnonzero(np.asarray(self._stamps) >= 0)
+        if slots.shape[0] == 0:
+            return
+        with open(self.filename + '.json', 'r') as fd:
+            meta = json.load(fd)
+        self._data = open_memmap(self.filename + '.npy', mode='r+')
+        self._shape = tuple(meta['shape'])
+        self._dtype = np.dtype(meta.get('dtype', self._data.dtype.str))
+        slots = slots[np.argsort(self._stamps[slots])]
+        for i in slots:
+            i = int(i)
+            key = _array_key(self._get_value_at(i))
+            self._keys[i] = key
+            self._index[key] = i
+            self._restore_at(i, nbytes=self._data[i].nbytes)
+        self._num_appended = int(self._stamps[slots[-1]]) + 1
+        self._num_used = int(slots.max()) + 1
+        self._tree_new = list(slots) if self._spatial_index else []
+
+    def _write_meta(self):
+        """
+        Write the shape and the type of the values.
+        """
+        with open(self.filename + '.json', 'w') as fd:
+            json.dump({'shape': list(self._shape),
+                       'dtype': self._dtype.str}, fd)
+
+    def _allocate(self, value):
+        self._shape = value.shape
+        self._dtype = value.dtype
+        self._write_meta()
+        self._data = open_memmap(self.filename + '.npy', mode='w+',
+                                 dtype=np.result_type(value.dtype, float),
+                                 shape=(self.max_size, value.size))
+
+    def _set_value_at(self, i, value):
+        dtype = self._dtype
+        super(MemmapArrayCache, self)._set_value_at(i, value)
+        if dtype is not None and self._dtype != dtype:
+            self._write_meta()
+
+    def flush(self):
+        """
+        Write any changes to the disk.
+        """
+        self._stamps.flush()
+        if self._data is not None:
+            self._data.flush()
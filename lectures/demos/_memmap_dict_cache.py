@@ -0,0 +1,217 @@
+"""
+A cache of dictionaries of numpy arrays that lives on the disk.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['MemmapDictCache']
+
+
+import os
+import json
+import numpy as np
+from numpy.lib.format import open_memmap
+from . import Cache
+from . import nbytes_of
+
+
+class MemmapDictCache(Cache):
+
+    """
+    A cache of dictionaries of numpy arrays memory-mapped to files.
+
+    It is meant to hold the outputs of a :class:`vuq.Model`, i.e.,
+    dictionaries with the keys ``f``, ``f_grad`` and ``f_grad_2``, in the
+    slots of a :class:`vuq.MemmapArrayCache`. It cannot look up values. Each
+    key is stored in its own array of shape ``(max_size, ) + shape``, so the
+    outputs take no more space than the raw numbers. Plain numpy arrays can
+    be stored too.
+
+    The keys are fixed by the first value stored in the cache. The shape and
+    the type of a key are fixed by its first value that is not ``None``, when
+    its array is allocated. A key may be ``None`` in any slot, e.g., the
+    derivatives of an evaluation at a lower order.
+
+    The cache uses the following files:
+
+        + ``filename + '.json'``:           The keys, shapes and types.
+        + ``filename + '.<key>.npy'``:      The values of each key.
+        + ``filename + '.<key>.has.npy'``:  Which slots hold a value of each
+                                            key.
+        + ``filename + '.mask.npy'``:       Which slots are occupied.
+
+    :param filename:    The prefix of the files.
+    :param dtype:       The type used to store the arrays, e.g.,
+                        ``np.float32`` halves the space. If ``None``, the type
+                        of the first value is used.
+    """
+
+    # The prefix of the files
+    _filename = None
+
+    # The type used to store the arrays
+    _dtype = None
+
+    # The layout of the values (``None`` until the first value is stored)
+    _layout = None
+
+    # The arrays of each key
+    _arrays = None
+
+    # Which slots hold a value of each key
+    _has = None
+
+    # Which slots are occupied
+    _mask = None
+
+    @property
+    def filename(self):
+        """
+        :getter:    The prefix of the files.
+        """
+        return self._filename
+
+    def __init__(self, filename, max_size=256, name='Memmap Dict Cache',
+                 policy='fifo', max_bytes=None, dtype=None):
+        """
+        Initialize the object.
+        """
+        super(MemmapDictCache, self).__init__(max_size=max_size, name=name,
+                                              policy=policy,
+                                              max_bytes=max_bytes)
+        self._filename = filename
+        self._dtype = dtype
+        self._arrays = {}
+        self._has = {}
+        mask_file = filename + '.mask.npy'
+        if os.path.exists(mask_file):
+            self._mask = open_memmap(mask_file, mode='r+')
+            if self._mask.shape[0] != max_size:
+                raise ValueError('The cache in ' + filename + ' has max_size '
+                                 + str(self._mask.shape[0]) + '.')
+            self._load()
+        else:
+            self._mask = open_memmap(mask_file, mode='w+', dtype=bool,
+                                     shape=(max_size, ))
+
+    def _array_file(self, key):
+        return self.filename + '.' + key + '.npy'
+
+    def _has_file(self, key):
+        return self.filename + '.' + key + '.has.npy'
+
+    def _load(self):
+        """
+        Load the layout and the arrays stored on the disk.
+        """
+        if not os.path.exists(self.filename + '.json'):
+            return
+        with open(self.filename + '.json', 'r') as fd:
+            self._layout = json.load(fd)
+        for key, spec in self._layout['keys'].items():
+            if spec is None:
+                continue
+            self._arrays[key] = open_memmap(self._array_file(key), mode='r+')
+            if os.path.exists(self._has_file(key)):
+                self._has[key] = open_memmap(self._has_file(key), mode='r+')
+            else:
+                # Written before a key could be None in some slots
+                self._has[key] = open_memmap(self._has_file(key), mode='w+',
+                                             dtype=bool,
+                                             shape=(self.max_size, ))
+                self._has[key][:] = self._mask
+        for i in np.flatnonzero(np.asarray(self._mask)):
+            i = int(i)
+            self._restore_at(i, nbytes=nbytes_of(self._get_value_at(i)))
+
+    def _write_layout(self):
+        """
+        Write the layout to the disk.
+        """
+        with open(self.filename + '.json', 'w') as fd:
+            json.dump(self._layout, fd)
+
+    def _allocate(self, key, v):
+        """
+        Allocate the array of ``key`` for values like ``v``.
+        """
+        dtype = np.dtype(self._dtype if self._dtype is not None else v.dtype)
+        self._arrays[key] = open_memmap(self._array_file(key), mode='w+',
+                                        dtype=dtype,
+                                        shape=(self.max_size, ) + v.shape)
+        self._has[key] = open_memmap(self._has_file(key), mode='w+',
+                                     dtype=bool, shape=(self.max_size, ))
+        self._layout['keys'][key] = {'shape': list(v.shape),
+                                     'dtype': dtype.str}
+
+    def _set_value_at(self, i, value):
+        if self._layout is None:
+            is_dict = isinstance(value, dict)
+            keys = value.keys() if is_dict else ['value']
+            self._layout = {'is_dict': is_dict,
+                            'keys': dict((key, None) for key in keys)}
+            self._write_layout()
+        if not self._layout['is_dict']:
+            value = {'value': value}
+        # Check every key before writing any, so that a value that does not
+        # fit the layout leaves nothing behind
+        keys = self._layout['keys']
+        for key in value:
+            if key not in keys:
+                raise ValueError('The layout has no ' + key + '.')
+        arrays = {}
+        for key, spec in keys.items():
+            if key not in value:
+                raise ValueError('The value has no ' + key + '.')
+            v = value[key]
+            if v is None:
+                continue
+            v = np.asarray(v)
+            if spec is None:
+                arrays[key] = v
+                continue
+            try:
+                arrays[key] = np.broadcast_to(v, spec['shape'])
+            except ValueError:
+                raise ValueError('The layout says that ' + key + ' has shape '
+                                 + str(tuple(spec['shape'])) + '.')
+        new = [key for key in arrays if keys[key] is None]
+        for key in new:
+            self._allocate(key, arrays[key])
+        if new:
+            self._write_layout()
+        for key, v in arrays.items():
+            self._arrays[key][i] = v
+        for key in self._has:
+            self._has[key][i] = key in arrays
+        self._mask[i] = True
+
+    def _clear_at(self, i):
+        self._mask[i] = False
+
+    def _do_get_index_of(self, value):
+        raise NotImplementedError('A MemmapDictCache cannot look up values.')
+
+    def _get_value_at(self, i):
+        value = {}
+        for key in self._layout['keys']:
+            if key in self._arrays and self._has[key][i]:
+                value[key] = np.array(self._arrays[key][i])
+            else:
+                value[key] = None
+        if not self._layout['is_dict']:
+            return value['value']
+        return value
+
+    def flush(self):
+        """
+        Write any changes to the disk.
+        """
+        self._mask.flush()
+        for a in self._arrays.values():
+            a.flush()
+        for a in self._has.values():
+            a.flush()
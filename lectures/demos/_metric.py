@@ -0,0 +1,238 @@
+"""
+Distance metrics used to compare the entries of array caches.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['Metric', 'EuclideanMetric', 'MaxAbsMetric', 'ScaledMetric',
+           'CallableMetric', 'make_metric']
+
+
+import numpy as np
+from . import _utils
+from . import regularize_array
+from . import euclidean_distance
+
+
+class Metric(object):
+
+    """
+    A generic class representing a distance metric.
+
+    A metric compares one point with many (:meth:`to_many()`) in a single
+    call without allocating anything per pair. The metrics of this module
+    use the compiled loops of :func:`scipy.spatial.distance.cdist`, which
+    are faster than numpy expressions that make temporary arrays. Calling
+    the object compares many points with many like
+    :func:`scipy.spatial.distance.cdist`.
+
+    If the distance is a Minkowski distance of some linear transformation of
+    the points, :meth:`transform()` is the transformation and :attr:`p` is
+    the exponent. This is what a KD-tree needs. Otherwise, :attr:`p` is
+    ``None``.
+    """
+
+    # The exponent of the Minkowski distance (``None`` if it is not one)
+    _p = None
+
+    # A name for the object
+    __name__ = None
+
+    @property
+    def p(self):
+        """
+        :getter:    The exponent of the Minkowski distance of the transformed
+                    points (``None`` if it is not one).
+        """
+        return self._p
+
+    def __init__(self, name='Metric'):
+        """
+        Initialize the object.
+        """
+        self.__name__ = name
+
+    def transform(self, X):
+        """
+        Transform the points (the rows of ``X``) for a KD-tree.
+        """
+        return X
+
+    def to_many(self, x, Y):
+        """
+        Return the distances of the point ``x`` (1D) from the rows of ``Y``.
+        """
+        raise NotImplementedError('Implement me!')
+
+    def pairwise(self, X, Y):
+        """
+        Return the distances between the rows of ``X`` and the rows of ``Y``.
+        """
+        return np.array([self.to_many(x, Y) for x in X])
+
+    def __call__(self, x, y):
+        """
+        Return the distances between all pairs like
+        :func:`scipy.spatial.distance.cdist`.
+        """
+        return self.pairwise(regularize_array(x), regularize_array(y))
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        return 'Name: ' + self.__name__
+
+
+class EuclideanMetric(Metric):
+
+    """
+    The Euclidean distance.
+    """
+
+    _p = 2
+
+    def __init__(self, name='Euclidean Metric'):
+        """
+        Initialize the object.
+        """
+        super(EuclideanMetric, self).__init__(name=name)
+
+    def to_many(self, x, Y):
+        return _utils._cdist(x.reshape((1, -1)), Y)[0]
+
+    def pairwise(self, X, Y):
+        return _utils._cdist(X, Y)
+
+
+class MaxAbsMetric(Metric):
+
+    """
+    The maximum absolute difference of the elements (Chebyshev distance).
+    """
+
+    _p = np.inf
+
+    def __init__(self, name='Max Abs Metric'):
+        """
+        Initialize the object.
+        """
+        super(MaxAbsMetric, self).__init__(name=name)
+
+    def to_many(self, x, Y):
+        return _utils._cdist(x.reshape((1, -1)), Y, 'chebyshev')[0]
+
+    def pairwise(self, X, Y):
+        return _utils._cdist(X, Y, 'chebyshev')
+
+
+class ScaledMetric(Metric):
+
+    """
+    The distance ``sqrt((x - y)^T M (x - y))`` with a fixed matrix ``M``.
+
+    With ``M`` the inverse of a covariance matrix, this is the Mahalanobis
+    distance. With a diagonal ``M``, it is a Euclidean distance with a
+    different scale per dimension.
+
+    :param M:   A symmetric positive definite matrix or a vector with its
+                diagonal.
+    """
+
+    _p = 2
+
+    # The variances of a diagonal metric (``None`` otherwise)
+    _V = None
+
+    def __init__(self, M, name='Scaled Metric'):
+        """
+        Initialize the object.
+        """
+        super(ScaledMetric, self).__init__(name=name)
+        M = np.asarray(M, dtype=float)
+        if M.ndim == 1:
+            assert np.all(M > 0.)
+            # A standardized Euclidean distance, no transformation needed
+            self._V = 1. / M
+            M = np.diag(M)
+        assert M.ndim == 2 and M.shape[0] == M.shape[1]
+        self._M = M
+        # M = L L^T, so the distance is the Euclidean one of X L
+        self._L = np.linalg.cholesky(M)
+
+    @property
+    def M(self):
+        """
+        :getter:    The matrix of the metric.
+        """
+        return self._M
+
+    def transform(self, X):
+        return np.dot(X, self._L)
+
+    def to_many(self, x, Y):
+        return self.pairwise(x.reshape((1, -1)), Y)[0]
+
+    def pairwise(self, X, Y):
+        if self._V is not None:
+            return _utils._cdist(X, Y, 'seuclidean', V=self._V)
+        return _utils._cdist(self.transform(X), self.transform(Y))
+
+
+class CallableMetric(Metric):
+
+    """
+    A metric made out of a function that works like
+    :func:`scipy.spatial.distance.cdist`.
+
+    :param dist:    The function.
+    """
+
+    def __init__(self, dist, name='Callable Metric'):
+        """
+        Initialize the object.
+        """
+        super(CallableMetric, self).__init__(name=name)
+        self._dist = dist
+
+    def to_many(self, x, Y):
+        return np.ravel(self._dist(x.reshape((1, -1)), Y))
+
+    def pairwise(self, X, Y):
+        return self._dist(X, Y)
+
+
+_METRICS = {'euclidean': EuclideanMetric,
+            'maxabs': MaxAbsMetric,
+            'chebyshev': MaxAbsMetric,
+            'scaled': ScaledMetric,
+            'mahalanobis': ScaledMetric}
+
+
+def make_metric(metric, **kwargs):
+    """
+    Make a distance metric.
+
+    :param metric:  A :class:`vuq.Metric`, a subclass of it, one of
+                    ``'euclidean'``, ``'maxabs'`` (or ``'chebyshev'``) and
+                    ``'scaled'`` (or ``'mahalanobis'``), or a function that
+                    works like :func:`scipy.spatial.distance.cdist`.
+    :param kwargs:  Passed to the constructor of the metric, e.g., ``M`` for
+                    ``'scaled'``.
+    """
+    if isinstance(metric, Metric):
+        return metric
+    if isinstance(metric, type) and issubclass(metric, Metric):
+        return metric(**kwargs)
+    if metric is euclidean_distance:
+        return EuclideanMetric()
+    if isinstance(metric, str):
+        if metric not in _METRICS:
+            raise ValueError('Unknown metric: ' + metric)
+        return _METRICS[metric](**kwargs)
+    if callable(metric):
+        return CallableMetric(metric)
+    raise ValueError('Unknown metric: ' + str(metric))
@@ -10,11 +10,31 @@ Date:
 """
 
 
+import asyncio
+import inspect
+import functools
 import numpy as np
 from . import call_many
+from . import regularize_array
+from . import stream_many
+from . import ModelOutput
+from . import ModelOutputFile
+from . import Profiler
 from . import CachedFunction
 
 
+def _takes_order(func):
+    """
+    Does ``func`` take the keyword argument ``order``?
+    """
+    try:
+        params = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return True
+    return ('order' in params
+            or any(p.kind == p.VAR_KEYWORD for p in params.values()))
+
+
 class Model(object):
 
     """
@@ -25,6 +45,17 @@ class Model(object):
     The bottom line is that it should evaluate the model and its first derivatives
     with respect to every parameter.
 
+    Models whose computations vectorize over many inputs may also implement
+    :meth:`vuq.Model._eval_batch()`, which is then preferred by
+    :meth:`vuq.Model.__call__()`.
+
+    From asyncio code, use :meth:`vuq.Model.aeval()` and
+    :meth:`vuq.Model.aeval_many()`, which run ``_eval()`` in an executor
+    without blocking the event loop.
+
+    Profiling is opt-in, see :meth:`vuq.Model.enable_profiling()`. The
+    children may mark the parts of their evaluation with :func:`vuq.span()`.
+
     """
 
     # A name for the model
@@ -42,6 +73,12 @@ class Model(object):
     # Can this model compute hessians?
     _compute_hessian = None
 
+    # The profiler of the evaluations (None if profiling is disabled)
+    _profiler = None
+
+    # Does _eval() take the order of derivatives?
+    _eval_takes_order = True
+
     @property
     def num_input(self):
         """
@@ -82,47 +119,278 @@ class Model(object):
         self._compute_hessian = compute_hessian
         if self.compute_hessian:
             assert self.compute_grad
+        self._eval_takes_order = _takes_order(self._eval)
 
-    def _eval(self, x):
+    def _eval(self, x, order=2):
         """
         Evaluate the model at a single input ``x``.
 
-        :param x:   The input at which we want to evaluate the model. It should have
-                    the :attr:`vuq.Model.num_input` dimensions.
-        :type x:    :class:`numpy.ndarray`
+        :param x:       The input at which we want to evaluate the model. It should have
+                        the :attr:`vuq.Model.num_input` dimensions.
+        :type x:        :class:`numpy.ndarray`
+        :param order:   The highest order of derivatives to compute (0, 1 or 2). The
+                        derivatives of higher order should not be computed at all.
         :returns:   A dictionary containing the following keys:
                     + f:        The output of the model, 1D array of num_output
                                 dimensions.
                     + f_grad:   The Jacobian of the model at x, a 2D array of size
                                 num_output x num_input dimensions. Return None, if
-                                you cannot compute the Jacobian.
+                                you cannot compute the Jacobian or ``order < 1``.
                     + f_grad_2: a 3D array of num_ouptut x num_input x num_input
                                 dimensions. Return None, if you cannot compute the
-                                Hessian.
+                                Hessian or ``order < 2``.
         """
         raise NotImplementedError('My children should implement this!')
 
-    def __call__(self, x):
+    def _eval_batch(self, X, order=2):
+        """
+        Evaluate the model at all the rows of ``X`` at once (optional).
+
+        :param X:       The inputs, a 2D array of num_points x num_input.
+        :param order:   The highest order of derivatives to compute.
+        :returns:       A dictionary with the same keys as the one of
+                        :meth:`vuq.Model._eval()`, but the arrays have one more
+                        (leading) dimension for the points.
+        """
+        raise NotImplementedError('Implement me (optional)!')
+
+    def enable_profiling(self, memory=False, **kwargs):
+        """
+        Start profiling the evaluations of the model.
+
+        Each evaluation becomes a span (``'_eval'`` or ``'_eval_batch'``) of
+        a :class:`vuq.Profiler` and the spans that the model marks with
+        :func:`vuq.span()` are recorded in it. The statistics accumulate
+        over all the evaluations until profiling is disabled. With
+        ``executor='process'``, the evaluations are recorded by copies of the
+        profiler in the workers and are lost.
+
+        :param memory:  Measure the peak memory of each evaluation?
+        :param kwargs:  Passed to the constructor of :class:`vuq.Profiler`.
+        :returns:       The profiler.
+        """
+        self.disable_profiling()
+        self._profiler = Profiler(memory=memory, **kwargs)
+        return self._profiler
+
+    def disable_profiling(self):
+        """
+        Stop profiling the evaluations of the model.
+
+        :returns:   The profiler (``None`` if profiling was not enabled).
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.close()
+        self._profiler = None
+        return profiler
+
+    @property
+    def profiler(self):
+        """
+        :getter:    The profiler of the evaluations (``None`` if profiling is
+                    disabled).
+        """
+        return self._profiler
+
+    def _eval_profiled(self, x, order=2):
+        """
+        Call :meth:`vuq.Model._eval()`, profiling it if enabled.
+
+        Models that implement ``_eval(self, x)`` compute all the orders and
+        those that were not asked for are dropped.
+        """
+        if self._profiler is None:
+            return self._eval_at(x, order)
+        with self._profiler.activate(), self._profiler.span('_eval'):
+            return self._eval_at(x, order)
+
+    def _eval_at(self, x, order):
+        """
+        Call :meth:`vuq.Model._eval()` at ``order``.
+        """
+        if self._eval_takes_order:
+            return self._eval(x, order=order)
+        y = self._eval(x)
+        if order < 2:
+            y = dict(y)
+            y['f_grad_2'] = None
+            if order < 1:
+                y['f_grad'] = None
+        return y
+
+    def _eval_batch_profiled(self, X, order=2):
+        """
+        Call :meth:`vuq.Model._eval_batch()`, profiling it if enabled.
+        """
+        if self._profiler is None:
+            return self._eval_batch(X, order=order)
+        with self._profiler.activate(), self._profiler.span('_eval_batch'):
+            return self._eval_batch(X, order=order)
+
+    @property
+    def has_eval_batch(self):
+        """
+        :getter:    ``True`` if this model implements
+                    :meth:`vuq.Model._eval_batch()`.
+        """
+        return type(self)._eval_batch is not Model._eval_batch
+
+    def __call__(self, x, order=2, executor=None, num_workers=None,
+                 chunk_size=None):
         """
         Evaluate the model at many inputs ``x``.
 
+        Only the derivatives up to ``order`` are computed (and allocated). If
+        the model implements :meth:`vuq.Model._eval_batch()`, it is called on
+        chunks of ``chunk_size`` rows (all rows at once when serial and
+        ``chunk_size`` is ``None``).
+
+        The inputs may be evaluated in parallel, see :func:`vuq.call_many()`.
+        With ``executor='process'``, the model is sent once to each worker.
+
         :param x:  The input. It should always be a 2D matrix with the rows representing
                    different points and the columns different inputs. The dimensions
                    of x should be ``num_points x num_input``.
         :type x:   :class:`numpy.ndarray`
-        :returns:  A dictionary containing the following keys:
-                   + f:         The output at each row of x, 1D array of size x.shape[0].
-                                Each element if of whatever type is the output of   
-                                the model.
-                   + f_grad:    A list of the Jacobians of each row of x.
-                   + f_grad_2:  A list of the Hessians of each row of x.
-        """
-        out = call_many(x, self._eval, return_numpy=False)
-        state = {}
-        state['f'] = np.array([s['f'] for s in out])
-        state['f_grad'] = [s['f_grad'] for s in out]
-        state['f_grad_2'] = [s['f_grad_2'] for s in out]
-        return state
+        :param order:   The highest order of derivatives (0, 1 or 2).
+        :returns:  A :class:`vuq.ModelOutput`, which works like a dictionary
+                   containing the following keys:
+                   + f:         The outputs at each row of x, 2D array of size
+                                x.shape[0] x num_output.
+                   + f_grad:    The Jacobians of each row of x, 3D array (None if
+                                the model does not compute them).
+                   + f_grad_2:  The Hessians of each row of x, 4D array (None if
+                                the model does not compute them).
+        """
+        assert order in (0, 1, 2)
+        x = regularize_array(np.asarray(x))
+        out = ModelOutput(x.shape[0], self.num_output, self.num_input,
+                          grad=self.compute_grad and order >= 1,
+                          hessian=self.compute_hessian and order >= 2)
+        if self.has_eval_batch:
+            func = functools.partial(self._eval_batch_profiled, order=order)
+            store = out.set_rows
+        else:
+            func = functools.partial(self._eval_profiled, order=order)
+            store = out.set_point
+        call_many(x, func, executor=executor, num_workers=num_workers,
+                  chunk_size=chunk_size, store=store,
+                  vectorized=self.has_eval_batch)
+        return out
+
+    def eval_to_disk(self, x, prefix, order=2, chunk_size=1024,
+                     executor=None, num_workers=None):
+        """
+        Evaluate the model at many inputs ``x`` and stream the outputs to
+        files.
+
+        The inputs are read and evaluated in chunks of ``chunk_size`` rows
+        (see :func:`vuq.stream_many()`) and each chunk is written to a
+        :class:`vuq.ModelOutputFile` as soon as it is ready. So, neither the
+        inputs nor the outputs need to fit in memory. If the files exist
+        (e.g., the run was interrupted), the chunks that are done are not
+        evaluated again.
+
+        :param x:           The inputs, a 2D array (e.g., an
+                            :class:`numpy.memmap`) or the name of a ``.npy``
+                            file.
+        :param prefix:      The prefix of the output files.
+        :param chunk_size:  The number of rows in a chunk. It must be the same
+                            when a run is resumed.
+        :returns:           The :class:`vuq.ModelOutputFile`.
+
+        See :meth:`vuq.Model.__call__()` for the rest of the arguments.
+        """
+        assert order in (0, 1, 2)
+        if isinstance(x, str):
+            x = np.load(x, mmap_mode='r')
+        assert x.ndim == 2 and x.shape[1] == self.num_input
+        out = ModelOutputFile(prefix, x.shape[0], self.num_output,
+                              self.num_input, chunk_size=chunk_size,
+                              grad=self.compute_grad and order >= 1,
+                              hessian=self.compute_hessian and order >= 2)
+        if self.has_eval_batch:
+            func = functools.partial(self._eval_batch_profiled, order=order)
+        else:
+            func = functools.partial(self._eval_profiled, order=order)
+        for start, y in stream_many(x, func, chunk_size=chunk_size,
+                                    executor=executor,
+                                    num_workers=num_workers,
+                                    vectorized=self.has_eval_batch,
+                                    skip=out.done_chunks):
+            if self.has_eval_batch:
+                out.set_rows(start, y)
+            else:
+                for j, y_j in enumerate(y):
+                    out.set_point(start + j, y_j)
+            out.finish_chunk(start // chunk_size)
+        return out
+
+    async def aeval(self, x, order=2, executor=None, timeout=None):
+        """
+        Evaluate the model at a single input ``x`` without blocking the event
+        loop.
+
+        :meth:`vuq.Model._eval()` runs in ``executor`` (the default executor
+        of the loop if ``None``). If the call is cancelled or takes longer
+        than ``timeout`` seconds, the waiting stops and, if the evaluation
+        has not started yet, it never runs. An evaluation that has started
+        cannot be interrupted, but its result is discarded.
+
+        :param x:       The input, a 1D array of num_input dimensions.
+        :param order:   The highest order of derivatives (0, 1 or 2).
+        :param timeout: The seconds to wait (``None`` for no limit). If it is
+                        exceeded, :class:`asyncio.TimeoutError` is raised.
+        :returns:       The dictionary returned by :meth:`vuq.Model._eval()`.
+        """
+        assert order in (0, 1, 2)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor,
+                                      functools.partial(self._eval_profiled,
+                                                        np.asarray(x),
+                                                        order=order))
+        return await asyncio.wait_for(future, timeout)
+
+    async def aeval_many(self, x, order=2, concurrency=4, executor=None,
+                         timeout=None):
+        """
+        Evaluate the model at many inputs ``x`` without blocking the event
+        loop.
+
+        At most ``concurrency`` evaluations are given to ``executor`` at any
+        time. The next input is submitted only when one of them finishes, so
+        many concurrent calls do not flood the executor. If an evaluation
+        fails or exceeds ``timeout`` seconds, or if this call is cancelled,
+        the inputs that have not been submitted are dropped and the error is
+        raised. See :meth:`vuq.Model.aeval()` for the rest of the arguments.
+
+        :returns:   A :class:`vuq.ModelOutput` like the one of
+                    :meth:`vuq.Model.__call__()`.
+        """
+        assert order in (0, 1, 2)
+        assert concurrency >= 1
+        x = regularize_array(np.asarray(x))
+        out = ModelOutput(x.shape[0], self.num_output, self.num_input,
+                          grad=self.compute_grad and order >= 1,
+                          hessian=self.compute_hessian and order >= 2)
+        rows = iter(range(x.shape[0]))
+
+        async def worker():
+            # The workers share the iterator, so each row is taken once
+            for i in rows:
+                out.set_point(i, await self.aeval(x[i, :], order=order,
+                                                  executor=executor,
+                                                  timeout=timeout))
+
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(concurrency, x.shape[0]))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+        return out
 
     def __str__(self):
         """
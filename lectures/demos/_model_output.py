@@ -0,0 +1,149 @@
+"""
+The outputs of a model evaluated at many inputs.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['ModelOutput']
+
+
+import numpy as np
+
+
+class ModelOutput(object):
+
+    """
+    The outputs of a :class:`vuq.Model` at ``num_points`` inputs.
+
+    The outputs, the Jacobians and the Hessians are kept in contiguous
+    arrays of shape ``(num_points, num_output)``, ``(num_points, num_output,
+    num_input)`` and ``(num_points, num_output, num_input, num_input)``. They
+    are allocated once and the output of each point is written in its row
+    with :meth:`set_point()` (or of many points with :meth:`set_rows()`).
+    :meth:`point()` returns views of the row of a point, i.e., nothing is
+    copied.
+
+    The object also works like the dictionary that :meth:`vuq.Model.__call__`
+    used to return, i.e., ``out['f']``, ``out['f_grad'][i]``, etc. The
+    derivatives that are not computed are ``None``.
+
+    :param grad:    Allocate the Jacobians?
+    :param hessian: Allocate the Hessians?
+    """
+
+    __slots__ = ('f', 'f_grad', 'f_grad_2')
+
+    # The keys of the dictionary interface
+    _KEYS = ('f', 'f_grad', 'f_grad_2')
+
+    def __init__(self, num_points, num_output, num_input, grad=True,
+                 hessian=True, dtype=float):
+        """
+        Initialize the object.
+        """
+        if hessian:
+            assert grad
+        self.f = np.empty((num_points, num_output), dtype=dtype)
+        self.f_grad = (np.empty((num_points, num_output, num_input),
+                                dtype=dtype) if grad else None)
+        self.f_grad_2 = (np.empty((num_points, num_output, num_input,
+                                   num_input), dtype=dtype)
+                         if hessian else None)
+
+    @property
+    def num_points(self):
+        """
+        :getter:    The number of points.
+        """
+        return self.f.shape[0]
+
+    def set_point(self, i, y):
+        """
+        Write the output ``y`` of point ``i`` (a dictionary like the one of
+        :meth:`vuq.Model._eval()`) to the arrays.
+
+        A derivative that is missing from ``y`` (or ``None``) is not
+        computed by the model, see :meth:`_missing()`.
+        """
+        self.f[i] = y['f']
+        for key in self._KEYS[1:]:
+            a = getattr(self, key)
+            if a is not None:
+                v = y.get(key)
+                if v is None:
+                    self._missing(key)
+                else:
+                    a[i] = v
+
+    def set_rows(self, start, y):
+        """
+        Write the outputs ``y`` of the points ``start``, ``start + 1``, ...
+        (a dictionary of arrays whose rows correspond to the points, e.g., a
+        :class:`vuq.ModelOutput`) to the arrays.
+        """
+        f = np.asarray(y['f'])
+        rows = slice(start, start + f.shape[0])
+        self.f[rows] = f
+        for key in self._KEYS[1:]:
+            a = getattr(self, key)
+            if a is not None:
+                v = y.get(key)
+                if v is None:
+                    self._missing(key)
+                else:
+                    a[rows] = v
+
+    def _missing(self, key):
+        """
+        Deal with a derivative ``key`` that was allocated but the model did
+        not compute. It becomes ``None`` for all the points, as if it was
+        not allocated (without the Hessians if it is the Jacobian).
+        """
+        self.f_grad_2 = None
+        if key == 'f_grad':
+            self.f_grad = None
+
+    def point(self, i):
+        """
+        Return views of the outputs of point ``i`` as a dictionary.
+        """
+        return dict((key, None if v is None else v[i])
+                    for key, v in self.items())
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._KEYS
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def keys(self):
+        return list(self._KEYS)
+
+    def values(self):
+        return [getattr(self, key) for key in self._KEYS]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self._KEYS]
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._KEYS else default
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        s = 'Outputs of ' + str(self.num_points) + ' points:\n'
+        for key, v in self.items():
+            s += key + ': ' + ('None' if v is None else str(v.shape)) + '\n'
+        return s
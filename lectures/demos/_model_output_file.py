@@ -0,0 +1,174 @@
+"""
+The outputs of a model evaluated at many inputs, stored on the disk.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['ModelOutputFile']
+
+
+import os
+import json
+import numpy as np
+from numpy.lib.format import open_memmap
+from . import ModelOutput
+
+
+class ModelOutputFile(ModelOutput):
+
+    """
+    A :class:`vuq.ModelOutput` whose arrays are memory-mapped to files.
+
+    The rows are written in chunks of ``chunk_size`` points. When a chunk is
+    complete, :meth:`finish_chunk()` flushes its rows to the disk and only
+    then marks it as done. So, if a run is interrupted, the chunks marked as
+    done are complete and the run can resume from the rest.
+
+    The object uses the following files:
+
+        + ``prefix + '.json'``:         The shapes and the chunk size.
+        + ``prefix + '.f.npy'``:        The outputs.
+        + ``prefix + '.f_grad.npy'``:   The Jacobians (if allocated).
+        + ``prefix + '.f_grad_2.npy'``: The Hessians (if allocated).
+        + ``prefix + '.chunks.npy'``:   Which chunks are done.
+
+    If the files exist, they are opened and the arguments must agree with
+    the stored ones. Use :meth:`open()` to open existing files without
+    knowing them.
+
+    See :class:`vuq.ModelOutput` for the rest of the parameters.
+
+    :param prefix:      The prefix of the files.
+    :param chunk_size:  The number of points in a chunk.
+    """
+
+    __slots__ = ('_prefix', '_chunk_size', '_done')
+
+    def __init__(self, prefix, num_points, num_output, num_input,
+                 chunk_size=1024, grad=True, hessian=True, dtype=float):
+        """
+        Initialize the object.
+        """
+        # The arrays are not allocated in memory, so ModelOutput.__init__()
+        # is not called
+        if hessian:
+            assert grad
+        assert chunk_size >= 1
+        self._prefix = prefix
+        self._chunk_size = int(chunk_size)
+        meta = {'num_points': int(num_points),
+                'num_output': int(num_output),
+                'num_input': int(num_input),
+                'chunk_size': self._chunk_size,
+                'grad': bool(grad),
+                'hessian': bool(hessian),
+                'dtype': np.dtype(dtype).str}
+        shapes = {'f': (num_points, num_output),
+                  'f_grad': (num_points, num_output, num_input),
+                  'f_grad_2': (num_points, num_output, num_input, num_input)}
+        num_chunks = -(-int(num_points) // self._chunk_size)
+        if os.path.exists(prefix + '.json'):
+            with open(prefix + '.json', 'r') as fd:
+                stored = json.load(fd)
+            if stored != meta:
+                raise ValueError('The outputs in ' + prefix + ' were made with '
+                                 + str(stored) + '.')
+            mode = 'r+'
+        else:
+            mode = 'w+'
+        allocate = {'f': True, 'f_grad': grad, 'f_grad_2': hessian}
+        for key in self._KEYS:
+            if allocate[key]:
+                a = open_memmap(prefix + '.' + key + '.npy', mode=mode,
+                                dtype=dtype, shape=shapes[key])
+            else:
+                a = None
+            setattr(self, key, a)
+        self._done = open_memmap(prefix + '.chunks.npy', mode=mode,
+                                 dtype=bool, shape=(num_chunks, ))
+        if mode == 'w+':
+            self._done[:] = False
+            self._done.flush()
+            # Written last, so that its existence means the files are there
+            with open(prefix + '.json', 'w') as fd:
+                json.dump(meta, fd)
+
+    def _missing(self, key):
+        # The files are already allocated
+        raise ValueError('The model did not compute ' + key + '. Ask for a '
+                         'lower order.')
+
+    @classmethod
+    def open(cls, prefix):
+        """
+        Open the outputs stored in the files with ``prefix``.
+        """
+        with open(prefix + '.json', 'r') as fd:
+            meta = json.load(fd)
+        return cls(prefix, meta['num_points'], meta['num_output'],
+                   meta['num_input'], chunk_size=meta['chunk_size'],
+                   grad=meta['grad'], hessian=meta['hessian'],
+                   dtype=np.dtype(meta['dtype']))
+
+    @property
+    def prefix(self):
+        """
+        :getter:    The prefix of the files.
+        """
+        return self._prefix
+
+    @property
+    def chunk_size(self):
+        """
+        :getter:    The number of points in a chunk.
+        """
+        return self._chunk_size
+
+    @property
+    def num_chunks(self):
+        """
+        :getter:    The number of chunks.
+        """
+        return self._done.shape[0]
+
+    @property
+    def done_chunks(self):
+        """
+        :getter:    The indices of the chunks that are done.
+        """
+        return np.flatnonzero(self._done)
+
+    @property
+    def is_complete(self):
+        """
+        :getter:    ``True`` if all the chunks are done.
+        """
+        return bool(np.all(self._done))
+
+    def finish_chunk(self, k):
+        """
+        Flush the rows of chunk ``k`` to the disk and mark it as done.
+        """
+        self.flush()
+        self._done[k] = True
+        self._done.flush()
+
+    def flush(self):
+        """
+        Write the arrays to the disk.
+        """
+        for a in self.values():
+            if a is not None:
+                a.flush()
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        s = super(ModelOutputFile, self).__str__()
+        s += ('Chunks done: ' + str(len(self.done_chunks)) + '/'
+              + str(self.num_chunks) + '\n')
+        return s
@@ -15,7 +15,21 @@ __all__ = ['NumpyArrayCache']
 
 import numpy as np
 from . import Cache
-from . import euclidean_distance
+from . import regularize_array
+from . import make_metric
+
+
+def _array_key(value):
+    """
+    Return a hashable key made out of the bytes of ``value``.
+
+    It returns ``None`` if ``value`` is not a numerical numpy array, in which
+    case the value is simply not indexed.
+    """
+    if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+        return None
+    return (value.dtype.str, value.size,
+            np.ascontiguousarray(value).tobytes())
 
 
 class NumpyArrayCache(Cache):
@@ -25,48 +39,317 @@ class NumpyArrayCache(Cache):
 
     See :class:`vuq.Cache` for the documentation of the overloaded functions.
 
-    :param dist:    The distance metric.
-    :param tol:     The tolerance below which two entries are considered to be
-                    identical.
+    The entries are stored as the rows of a single preallocated 2D array,
+    one row per slot. It is allocated the first time a value is appended and
+    all values must have the same number of elements.
+
+    Every array stored in the cache is also indexed by its bytes, so that
+    looking up a value that is byte-identical to a cached one costs O(1). If
+    ``tol`` is zero, this is the only lookup that is performed. Otherwise, if
+    the hash lookup fails, we fall back to searching for an entry within
+    ``tol`` of the query. The search compares the query with all the entries
+    in one call of :meth:`vuq.Metric.to_many()`.
+
+    For large caches with ``tol > 0``, the tolerance search can be done with a
+    KD-tree (``spatial_index=True``) instead. The tree is not updated on
+    every append. Instead, the entries appended after the last build are
+    checked directly and the tree is rebuilt once they exceed a fraction
+    ``rebuild_fraction`` of the cache. This is only possible for metrics
+    that are Minkowski distances of (transformed) points, e.g., all the
+    metrics of :func:`vuq.make_metric()`, but not arbitrary functions.
+
+    :param dist:                The distance metric. See
+                                :func:`vuq.make_metric()`.
+    :param tol:                 The tolerance below which two entries are
+                                considered to be identical.
+    :param spatial_index:       Use a KD-tree for the tolerance search.
+    :param rebuild_fraction:    The fraction of new entries that triggers a
+                                rebuild of the KD-tree.
     """
 
-    # The underlying cache (list of numpy arrays)
-    _cache = None
+    # The underlying storage (max_size x number of elements of an entry)
+    _data = None
+
+    # The shape of the stored values
+    _shape = None
+
+    # The type of the stored values (the storage holds floats)
+    _dtype = None
 
     # The distance metric
-    _dist = None
+    _metric = None
+
+    # The keys of the entries of the cache (one per slot)
+    _keys = None
+
+    # A dictionary mapping keys to slots
+    _index = None
+
+    # The number of values appended and cleared so far
+    _num_appended = None
+    _num_cleared = None
 
-    def __init__(self, dist=euclidean_distance, tol=1e-16,
-                 max_size=256, name='Numpy Array Cache'):
+    # The KD-tree used for the tolerance search (if any)
+    _tree = None
+
+    # The slots of the rows of the tree and the entries they held
+    _tree_slots = None
+    _tree_stamps = None
+
+    # The values of _num_appended and _num_cleared when the tree was built
+    _tree_appended = None
+    _tree_cleared = None
+
+    # The slots filled after the tree was built
+    _tree_new = None
+
+    # The number of values appended before the value at each slot (-1 for
+    # free slots)
+    _stamps = None
+
+    # One past the largest slot that has ever been used
+    _num_used = None
+
+    def __init__(self, dist='euclidean', tol=1e-16,
+                 max_size=256, name='Numpy Array Cache', policy='fifo',
+                 max_bytes=None, spatial_index=False, rebuild_fraction=0.1):
         """
         Initialize the object.
         """
-        super(NumpyArrayCache, self).__init__(max_size=max_size, name=name)
-        self._dist = dist
+        super(NumpyArrayCache, self).__init__(max_size=max_size, name=name,
+                                              policy=policy,
+                                              max_bytes=max_bytes)
+        assert tol >= 0.
+        assert rebuild_fraction > 0.
+        self._metric = make_metric(dist)
+        if spatial_index and self._metric.p is None:
+            raise ValueError('The spatial index requires a Minkowski metric.')
         self._tol = tol
-        self._cache = []
+        self._spatial_index = spatial_index
+        self._rebuild_fraction = rebuild_fraction
+        self._keys = [None] * max_size
+        self._index = {}
+        self._stamps = -np.ones(max_size, dtype=np.int64)
+        self._num_appended = 0
+        self._num_cleared = 0
+        self._tree_appended = 0
+        self._tree_cleared = 0
+        self._tree_new = []
+        self._num_used = 0
 
     @property
-    def size(self):
-        return len(self._cache)
-
-    def _do_append(self, value):
-        self._cache.append(value)
-
-    def drop_one(self):
-        self._cache = self._cache[1:]
-
-    def get_index_of(self, value):
-        i = -1
-        # We start iterating from the end of the sequence because it is more
-        # probably that we will be asked to query a value from the top of the
-        # cache
-        for j in range(self.size - 1, -1, -1):
-            d = self._dist(value, self._cache[i])
-            if d <= self._tol:
-                i = j
-                break
-        return i
+    def metric(self):
+        """
+        :getter:    The distance metric.
+        """
+        return self._metric
+
+    @property
+    def tol(self):
+        """
+        :getter:    The tolerance below which two entries are identical.
+        """
+        return self._tol
+
+    def _allocate(self, value):
+        """
+        Allocate the storage for values like ``value``.
+        """
+        self._shape = value.shape
+        self._dtype = value.dtype
+        self._data = np.empty((self.max_size, value.size),
+                              dtype=np.result_type(value.dtype, float))
+
+    def _set_value_at(self, i, value):
+        value = np.asarray(value)
+        if self._data is None:
+            self._allocate(value)
+        if value.size != self._data.shape[1]:
+            raise ValueError('Expected a value with %d elements, got %d.'
+                             % (self._data.shape[1], value.size))
+        if value.dtype != self._dtype:
+            self._dtype = np.result_type(self._dtype, value.dtype)
+        self._data[i, :] = value.reshape(-1)
+        key = _array_key(value)
+        if key is not None:
+            self._index[key] = i
+        self._keys[i] = key
+        self._stamps[i] = self._num_appended
+        self._num_appended += 1
+        self._num_used = max(self._num_used, i + 1)
+        if self._spatial_index:
+            self._tree_new.append(i)
+
+    def _clear_at(self, i):
+        key = self._keys[i]
+        # The key may point to a more recent copy of the same value
+        if key is not None and self._index.get(key) == i:
+            del self._index[key]
+        self._keys[i] = None
+        self._stamps[i] = -1
+        self._num_cleared += 1
+
+    def _search(self, value, slots):
+        """
+        Return the most recent of ``slots`` which is within ``tol`` of
+        ``value`` or -1.
+
+        :param slots:   An array of slots or a slice.
+        """
+        d = self._metric.to_many(value.reshape(-1), self._data[slots])
+        stamps = self._stamps[slots]
+        found = np.flatnonzero((d <= self._tol) & (stamps >= 0))
+        if found.shape[0] == 0:
+            return -1
+        # Prefer the most recent entry
+        j = found[np.argmax(stamps[found])]
+        if isinstance(slots, slice):
+            return int(j)
+        return int(slots[j])
+
+    def _do_get_index_of(self, value):
+        key = _array_key(value)
+        if key is not None:
+            i = self._index.get(key)
+            if i is not None:
+                return i
+        if self._tol == 0. or self.size == 0:
+            return -1
+        value = np.asarray(value)
+        if self._spatial_index:
+            return self._get_index_of_with_tree(value)
+        # The free slots are masked out, so we avoid copying the entries
+        return self._search(value, slice(0, self._num_used))
+
+    def _do_get_indices_of(self, values):
+        values = regularize_array(np.asarray(values))
+        idx = -np.ones(values.shape[0], dtype=int)
+        for j in range(values.shape[0]):
+            i = self._index.get(_array_key(values[j]))
+            if i is not None:
+                idx[j] = i
+        if self._tol == 0. or self.size == 0:
+            return idx
+        rest = np.flatnonzero(idx == -1)
+        if self._spatial_index:
+            for j in rest:
+                idx[j] = self._get_index_of_with_tree(values[j])
+            return idx
+        data = self._data[:self._num_used]
+        stamps = self._stamps[:self._num_used]
+        # Compare the values with all entries in chunks of bounded memory
+        chunk = max(1, 2 ** 22 // self._num_used)
+        for k in range(0, rest.shape[0], chunk):
+            rows = rest[k:k + chunk]
+            d = self._metric.pairwise(values[rows].reshape((rows.shape[0], -1)),
+                                      data)
+            # The stamps of the matches (-1 elsewhere), the most recent wins
+            m = np.where((d <= self._tol) & (stamps >= 0), stamps, -1)
+            j = np.argmax(m, axis=1)
+            found = m[np.arange(rows.shape[0]), j] >= 0
+            idx[rows[found]] = j[found]
+        return idx
+
+    def _rebuild_tree(self):
+        """
+        Rebuild the KD-tree from the current entries of the cache.
+        """
+        self._tree_appended = self._num_appended
+        self._tree_cleared = self._num_cleared
+        self._tree_new = []
+        if self.size == 0:
+            self._tree = None
+        else:
+            # Imported here because scipy.spatial takes long to import
+            from scipy.spatial import cKDTree
+            self._tree_slots = np.flatnonzero(self._stamps >= 0)
+            self._tree_stamps = self._stamps[self._tree_slots]
+            self._tree = cKDTree(
+                self._metric.transform(self._data[self._tree_slots]))
+
+    def _get_index_of_with_tree(self, value):
+        """
+        Search for ``value`` using the KD-tree and the entries not in it.
+        """
+        num_new = self._num_appended - self._tree_appended
+        num_stale = self._num_cleared - self._tree_cleared
+        if (num_new + num_stale) > self._rebuild_fraction * self.size:
+            self._rebuild_tree()
+        # Entries stored after the last build, checked in one go
+        if len(self._tree_new) > 0:
+            slots = np.array(self._tree_new)
+            slots = slots[self._stamps[slots] >= self._tree_appended]
+            i = self._search(value, slots)
+            if i != -1:
+                return i
+        if self._tree is None:
+            return -1
+        point = self._metric.transform(value.reshape((1, -1)))[0]
+        rows = np.array(self._tree.query_ball_point(point, self._tol,
+                                                    p=self._metric.p),
+                        dtype=int)
+        # Skip the rows whose slots have been cleared or reused
+        rows = rows[self._stamps[self._tree_slots[rows]]
+                    == self._tree_stamps[rows]]
+        if rows.shape[0] == 0:
+            return -1
+        # Prefer the most recent entry
+        return int(self._tree_slots[rows[np.argmax(self._tree_stamps[rows])]])
+
+    def _nearest_of(self, value, slots):
+        """
+        Return the nearest of ``slots`` to ``value`` and its distance.
+
+        :param slots:   An array of slots or a slice.
+        """
+        d = self._metric.to_many(value.reshape(-1), self._data[slots])
+        d[self._stamps[slots] < 0] = np.inf
+        j = int(np.argmin(d))
+        if not np.isfinite(d[j]):
+            return -1, np.inf
+        if isinstance(slots, slice):
+            return j, float(d[j])
+        return int(slots[j]), float(d[j])
+
+    def get_nearest(self, value):
+        """
+        Return the slot of the entry that is nearest to ``value`` and its
+        distance.
+
+        It returns ``(-1, inf)`` if the cache is empty. It does not count as
+        a hit for the eviction policy.
+        """
+        if self.size == 0:
+            return -1, np.inf
+        value = np.asarray(value)
+        if not self._spatial_index:
+            return self._nearest_of(value, slice(0, self._num_used))
+        num_new = self._num_appended - self._tree_appended
+        num_stale = self._num_cleared - self._tree_cleared
+        if (num_new + num_stale) > self._rebuild_fraction * self.size:
+            self._rebuild_tree()
+        best = (-1, np.inf)
+        if len(self._tree_new) > 0:
+            slots = np.array(self._tree_new)
+            slots = slots[self._stamps[slots] >= self._tree_appended]
+            if slots.shape[0] > 0:
+                best = self._nearest_of(value, slots)
+        if self._tree is None:
+            return best
+        k = min(8, self._tree_slots.shape[0])
+        point = self._metric.transform(value.reshape((1, -1)))[0]
+        d, rows = self._tree.query(point, k=k, p=self._metric.p)
+        d, rows = np.atleast_1d(d), np.atleast_1d(rows)
+        valid = (self._stamps[self._tree_slots[rows]]
+                 == self._tree_stamps[rows])
+        if not np.any(valid):
+            # The nearest rows of the tree are stale, look at everything
+            return self._nearest_of(value, slice(0, self._num_used))
+        j = np.flatnonzero(valid)[0]
+        if d[j] < best[1]:
+            best = (int(self._tree_slots[rows[j]]), float(d[j]))
+        return best
 
     def _get_value_at(self, i):
-        return self._cache[i]
+        # A copy, since the slot may be reused
+        return self._data[i].reshape(self._shape).astype(self._dtype)
@@ -0,0 +1,49 @@
+"""
+A cache of arbitrary python objects.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['ObjectCache']
+
+
+from . import Cache
+
+
+class ObjectCache(Cache):
+
+    """
+    A cache of arbitrary python objects.
+
+    It cannot look up values. It is meant to hold the outputs of a
+    :class:`vuq.CachedFunction` in the slots that correspond to its inputs.
+
+    See :class:`vuq.Cache` for the documentation of the overloaded functions.
+    """
+
+    # The underlying storage (preallocated list)
+    _cache = None
+
+    def __init__(self, max_size=256, name='Object Cache', policy='fifo',
+                 max_bytes=None):
+        """
+        Initialize the object.
+        """
+        super(ObjectCache, self).__init__(max_size=max_size, name=name,
+                                          policy=policy, max_bytes=max_bytes)
+        self._cache = [None] * max_size
+
+    def _set_value_at(self, i, value):
+        self._cache[i] = value
+
+    def _clear_at(self, i):
+        self._cache[i] = None
+
+    def _do_get_index_of(self, value):
+        raise NotImplementedError('An ObjectCache cannot look up values.')
+
+    def _get_value_at(self, i):
+        return self._cache[i]
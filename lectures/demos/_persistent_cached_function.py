@@ -0,0 +1,83 @@
+"""
+A cached function whose cache survives the process.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['PersistentCachedFunction']
+
+
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from . import CachedFunction
+from . import MemmapArrayCache
+from . import MemmapDictCache
+
+
+class PersistentCachedFunction(CachedFunction):
+
+    """
+    A cached function that stores its evaluations in a directory.
+
+    The inputs go to a :class:`vuq.MemmapArrayCache` and the outputs to a
+    :class:`vuq.MemmapDictCache`. Creating the object again with the same
+    ``path`` (e.g., after restarting a calibration or a notebook kernel)
+    reuses every evaluation stored there. The order of derivatives of each
+    evaluation (see :class:`vuq.CachedFunction`) is stored too, in
+    ``orders.npy``.
+
+    :param f:           The function.
+    :param path:        The directory in which the evaluations are stored.
+    :param max_size:    The maximum number of evaluations to store.
+    :param tol:         The tolerance below which two inputs are identical.
+    :param policy:      The eviction policy.
+    :param dtype:       The type used to store the outputs (e.g.,
+                        ``np.float32``). ``None`` keeps the type of the
+                        outputs.
+    """
+
+    def __init__(self, f, path, max_size=1024, tol=1e-16, policy='fifo',
+                 dtype=None):
+        """
+        Initialize the object.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        super(PersistentCachedFunction, self).__init__(
+            f,
+            input_cache_type=MemmapArrayCache,
+            input_cache_args={'filename': os.path.join(path, 'inputs'),
+                              'max_size': max_size, 'tol': tol,
+                              'policy': policy,
+                              'name': 'Input Cache'},
+            output_cache_type=MemmapDictCache,
+            output_cache_args={'filename': os.path.join(path, 'outputs'),
+                               'max_size': max_size, 'dtype': dtype,
+                               'name': 'Output Cache'})
+        orders_file = os.path.join(path, 'orders.npy')
+        if os.path.exists(orders_file):
+            self._orders = open_memmap(orders_file, mode='r+')
+        else:
+            self._orders = open_memmap(orders_file, mode='w+', dtype=np.int8,
+                                       shape=(max_size, ))
+        # Forget the inputs whose outputs never made it to the disk
+        for i in range(max_size):
+            if self._input_cache._occupied[i] and not self._output_cache._occupied[i]:
+                self._input_cache.drop_at(i)
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+        raise TypeError('A PersistentCachedFunction cannot decorate methods.')
+
+    def flush(self):
+        """
+        Write any changes to the disk.
+        """
+        self._input_cache.flush()
+        self._output_cache.flush()
+        self._orders.flush()
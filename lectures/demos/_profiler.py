@@ -0,0 +1,245 @@
+"""
+Timing spans and memory measurements of model evaluations.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['Profiler', 'span']
+
+
+import os
+import json
+import time
+import threading
+import contextlib
+import tracemalloc
+
+
+# The active profiler and the depth of the open spans of each thread
+_LOCAL = threading.local()
+
+
+# What span() returns when no profiler is active
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(name):
+    """
+    Time the code of a ``with`` block as the span ``name`` of the profiler
+    that is active in this thread (see :meth:`vuq.Profiler.activate()`).
+
+    If no profiler is active, nothing is recorded. So, models can mark the
+    parts of their evaluation with::
+
+        with vuq.span('solve'):
+            ...
+
+    at the cost of a function call when they are not profiled.
+    """
+    profiler = getattr(_LOCAL, 'profiler', None)
+    if profiler is None:
+        return _NO_SPAN
+    return profiler.span(name)
+
+
+class Profiler(object):
+
+    """
+    Records named timing spans.
+
+    For each span name, the profiler keeps the number of calls and the
+    total, minimum and maximum time. It also keeps a trace of the spans
+    (up to ``max_events``) that can be written as a Chrome trace file (open
+    it with ``chrome://tracing`` or Perfetto). The statistics accumulate
+    until :meth:`reset()` is called.
+
+    If ``memory`` is ``True``, :mod:`tracemalloc` measures the peak memory
+    allocated during each outermost span of a thread (e.g., an evaluation
+    of a model). The peak is global to the process, so the measurements of
+    spans that overlap in different threads include each other. Tracing
+    memory slows down python code considerably.
+
+    :param memory:      Measure the peak memory of the outermost spans?
+    :param max_events:  The maximum number of spans kept in the trace.
+    """
+
+    # The statistics of each span name: [count, total, min, max, peak memory,
+    # total peak memory, memory count]
+    _stats = None
+
+    # The trace events
+    _events = None
+
+    # The start of the times in the trace
+    _t0 = None
+
+    # Protects the statistics and the trace
+    _lock = None
+
+    # Did this object start tracemalloc?
+    _started_tracemalloc = False
+
+    # A name for the object
+    __name__ = None
+
+    def __init__(self, memory=False, max_events=100000, name='Profiler'):
+        """
+        Initialize the object.
+        """
+        self.__name__ = name
+        self._memory = memory
+        self._max_events = max_events
+        self._lock = threading.Lock()
+        self.reset()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def memory(self):
+        """
+        :getter:    ``True`` if the peak memory of the spans is measured.
+        """
+        return self._memory
+
+    def reset(self):
+        """
+        Forget all the spans recorded so far.
+        """
+        with self._lock:
+            self._stats = {}
+            self._events = []
+            self._t0 = time.perf_counter()
+
+    def close(self):
+        """
+        Stop :mod:`tracemalloc` if this object started it.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Make this the profiler that records the spans of :func:`vuq.span()`
+        in this thread for the duration of a ``with`` block.
+        """
+        previous = getattr(_LOCAL, 'profiler', None)
+        _LOCAL.profiler = self
+        try:
+            yield self
+        finally:
+            _LOCAL.profiler = previous
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """
+        Time the code of a ``with`` block as the span ``name``.
+        """
+        depth = getattr(_LOCAL, 'depth', 0)
+        _LOCAL.depth = depth + 1
+        measure = (self._memory and depth == 0 and tracemalloc.is_tracing())
+        if measure:
+            tracemalloc.reset_peak()
+            m0 = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            t1 = time.perf_counter()
+            peak = tracemalloc.get_traced_memory()[1] - m0 if measure else None
+            _LOCAL.depth = depth
+            self._record(name, t0, t1, peak)
+
+    def _record(self, name, t0, t1, peak):
+        """
+        Record a span that started at ``t0`` and ended at ``t1``.
+        """
+        dt = t1 - t0
+        with self._lock:
+            s = self._stats.get(name)
+            if s is None:
+                s = self._stats[name] = [0, 0., dt, dt, 0, 0, 0]
+            s[0] += 1
+            s[1] += dt
+            s[2] = min(s[2], dt)
+            s[3] = max(s[3], dt)
+            if peak is not None:
+                s[4] = max(s[4], peak)
+                s[5] += peak
+                s[6] += 1
+            if len(self._events) < self._max_events:
+                event = {'name': name, 'ph': 'X',
+                         'ts': (t0 - self._t0) * 1e6, 'dur': dt * 1e6,
+                         'pid': os.getpid(), 'tid': threading.get_ident()}
+                if peak is not None:
+                    event['args'] = {'peak_memory': peak}
+                self._events.append(event)
+
+    def to_dict(self):
+        """
+        Return the statistics of the spans as a dictionary (by span name).
+        """
+        with self._lock:
+            stats = {}
+            for name, s in self._stats.items():
+                d = {'count': s[0], 'total': s[1], 'mean': s[1] / s[0],
+                     'min': s[2], 'max': s[3]}
+                if s[6] > 0:
+                    d['peak_memory'] = s[4]
+                    d['mean_peak_memory'] = s[5] / s[6]
+                stats[name] = d
+        return stats
+
+    def dump_json(self, filename=None, **kw):
+        """
+        Return the statistics as a JSON string and, optionally, write them to
+        ``filename``.
+
+        The rest of the keyword arguments are passed to :func:`json.dumps()`.
+        """
+        s = json.dumps(self.to_dict(), **kw)
+        if filename is not None:
+            with open(filename, 'w') as fd:
+                fd.write(s)
+        return s
+
+    def dump_chrome_trace(self, filename):
+        """
+        Write the trace of the spans to ``filename`` in the Chrome trace
+        event format.
+        """
+        with self._lock:
+            trace = {'traceEvents': list(self._events),
+                     'displayTimeUnit': 'ms'}
+        with open(filename, 'w') as fd:
+            json.dump(trace, fd)
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        s = 'Name: ' + self.__name__ + '\n'
+        stats = self.to_dict()
+        for name in sorted(stats, key=lambda k: -stats[k]['total']):
+            d = stats[name]
+            s += (name + ': ' + str(d['count']) + ' calls, '
+                  + '%.3g' % d['total'] + ' s total, '
+                  + '%.3g' % d['mean'] + ' s mean')
+            if 'peak_memory' in d:
+                s += ', ' + str(d['peak_memory']) + ' bytes peak'
+            s += '\n'
+        return s
@@ -0,0 +1,393 @@
+"""
+A cached function whose cache is shared by many processes.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['SharedCachedFunction']
+
+
+import os
+import time
+import asyncio
+import hashlib
+import functools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing import resource_tracker
+import numpy as np
+from . import CachedFunction
+from . import EuclideanMetric
+
+
+# The locks created in this process, looked up by name after a fork
+_LOCKS = {}
+
+# The metric of the tolerance search
+_METRIC = EuclideanMetric()
+
+
+def _tracker_id():
+    """
+    Identify the resource tracker of this process (``None`` if shared memory
+    is not tracked).
+    """
+    if os.name != 'posix':
+        return None
+    st = os.fstat(resource_tracker.getfd())
+    return (st.st_dev, st.st_ino)
+
+
+def _attach(name, tracker):
+    """
+    Attach to the shared memory block ``name`` without letting the resource
+    tracker of this process destroy it when the process exits.
+
+    ``tracker`` identifies the resource tracker of the process that created
+    the block (see :func:`_tracker_id()`).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13 always registers the block. Processes started by the
+    # owner share its tracker, for which the block is already registered
+    # and is unregistered by unlink(). Any other tracker must forget it.
+    shm = shared_memory.SharedMemory(name=name)
+    if tracker is not None and _tracker_id() != tracker:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _digest(x):
+    """
+    A hash of the bytes of ``x`` which is the same in every process.
+    """
+    h = hashlib.blake2b(np.ascontiguousarray(x).tobytes(), digest_size=8)
+    return np.frombuffer(h.digest(), dtype=np.int64)[0]
+
+
+class SharedCachedFunction(CachedFunction):
+
+    """
+    A cached function whose cache lives in shared memory.
+
+    Copies of the object that are sent to other processes (e.g., the workers
+    of a :class:`multiprocessing.Pool`) attach to the same memory. So, the
+    evaluations of any process are hits for all the others.
+
+    The cache is a ring buffer of ``max_size`` slots in a single
+    :class:`multiprocessing.shared_memory.SharedMemory` block. It holds the
+    inputs, a hash of each input (the index), the order in which the entries
+    were added and the outputs. A lock protects all of it. Since the memory
+    must be allocated before it is shared, the shapes of the inputs and the
+    outputs must be known in advance.
+
+    A process that misses claims a slot for the input before evaluating the
+    function. Other processes that ask for the same input wait until the
+    output is ready instead of evaluating the function again. So, the number
+    of evaluations is the same as in serial execution (as long as
+    ``max_size`` is larger than the number of processes). If the evaluation
+    fails, the claim is released.
+
+    The lock is a :func:`multiprocessing.Lock` by default. This is found by
+    processes forked after the object was created, which is the case for
+    a pool started after it on Linux. For other start methods, pass a
+    lock that can be pickled, e.g., ``multiprocessing.Manager().Lock()``.
+
+    The process that creates the object owns the memory. It should call
+    :meth:`unlink()` when the cache is no longer needed.
+
+    :param f:               The function. It must be picklable.
+    :param num_input:       The number of elements of an input.
+    :param output_shapes:   A dictionary with the shape of each key of the
+                            output (``None`` for keys that are always
+                            ``None``), e.g., ``{'f': (35, ), 'f_grad':
+                            (35, 5), 'f_grad_2': (35, 5, 5)}``. If it is a
+                            tuple, the output is a single array of this shape.
+    :param max_size:        The number of slots.
+    :param tol:             The tolerance below which two inputs are
+                            identical. If it is zero, only inputs with the
+                            same bytes match.
+    :param lock:            The lock.
+    :param name:            The name of the shared memory block. If
+                            ``None``, a unique name is picked.
+    :param poll_interval:   The time (in seconds) between checks when waiting
+                            for another process.
+    :param wait_timeout:    The time (in seconds) after which a waiting
+                            process evaluates the function itself. ``None``
+                            waits for ever.
+    """
+
+    # The shared memory block
+    _shm = None
+
+    # Views of the arrays in the shared memory
+    _arrays = None
+
+    # Does this process own the memory?
+    _owner = None
+
+    # The resource tracker of the owner
+    _tracker = None
+
+    def __init__(self, f, num_input, output_shapes, max_size=256, tol=1e-16,
+                 lock=None, name=None, poll_interval=1e-3, wait_timeout=None):
+        """
+        Initialize the object.
+        """
+        assert isinstance(max_size, int) and max_size > 0
+        assert tol >= 0.
+        self._count = 0
+        self._count_eval = 0
+        self._f = f
+        self._num_input = int(num_input)
+        self._output_shapes = output_shapes
+        self._max_size = max_size
+        self._tol = tol
+        self._poll_interval = poll_interval
+        self._wait_timeout = wait_timeout
+        layout = self._layout()
+        nbytes = sum(np.prod(shape, dtype=int) * 8 for _, shape in layout)
+        self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                               size=int(nbytes))
+        self._owner = True
+        self._tracker = _tracker_id()
+        if lock is None:
+            lock = mp.Lock()
+            _LOCKS[self._shm.name] = lock
+        self._lock = lock
+        self._map_arrays()
+        self._arrays['header'][:] = 0
+        self._arrays['stamps'][:] = -1
+
+    @property
+    def name(self):
+        """
+        :getter:    The name of the shared memory block.
+        """
+        return self._shm.name
+
+    def _layout(self):
+        """
+        Return the names and shapes of the arrays in the shared memory.
+
+        All arrays have 8-byte elements, so they are always aligned.
+        """
+        layout = [('header', (3, )),
+                  ('stamps', (self._max_size, )),
+                  ('ready', (self._max_size, )),
+                  ('hashes', (self._max_size, )),
+                  ('inputs', (self._max_size, self._num_input))]
+        if isinstance(self._output_shapes, dict):
+            for key in sorted(self._output_shapes):
+                shape = self._output_shapes[key]
+                if shape is not None:
+                    layout.append(('out:' + key,
+                                   (self._max_size, ) + tuple(shape)))
+        else:
+            layout.append(('out:', (self._max_size, )
+                           + tuple(self._output_shapes)))
+        return layout
+
+    def _map_arrays(self):
+        """
+        Make numpy views of the arrays in the shared memory.
+        """
+        self._arrays = {}
+        offset = 0
+        for key, shape in self._layout():
+            dtype = np.int64 if not key.startswith('out:') else float
+            self._arrays[key] = np.ndarray(shape, dtype=dtype,
+                                           buffer=self._shm.buf,
+                                           offset=offset)
+            offset += int(np.prod(shape, dtype=int)) * 8
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_shm']
+        del state['_arrays']
+        state['_shm_name'] = self._shm.name
+        state['_owner'] = False
+        if _LOCKS.get(self._shm.name) is self._lock:
+            state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        name = state.pop('_shm_name')
+        self.__dict__.update(state)
+        if self._lock is None:
+            if name not in _LOCKS:
+                raise RuntimeError('The lock of the shared cache was not '
+                                   'inherited. Pass a picklable lock, e.g., '
+                                   'multiprocessing.Manager().Lock().')
+            self._lock = _LOCKS[name]
+        self._shm = _attach(name, self._tracker)
+        self._map_arrays()
+
+    def __get__(self, obj, type=None):
+        raise TypeError('A SharedCachedFunction cannot wrap methods.')
+
+    def _find(self, x, h):
+        """
+        Return the slot of ``x`` (with hash ``h``) or -1. Call with the lock.
+        """
+        stamps = self._arrays['stamps']
+        inputs = self._arrays['inputs']
+        for i in np.flatnonzero((self._arrays['hashes'] == h) & (stamps >= 0)):
+            if np.array_equal(inputs[i], x):
+                return int(i)
+        if self._tol == 0.:
+            return -1
+        d = _METRIC.to_many(x, inputs)
+        found = np.flatnonzero((d <= self._tol) & (stamps >= 0))
+        if found.shape[0] == 0:
+            return -1
+        return int(found[np.argmax(stamps[found])])
+
+    def _get_output(self, i):
+        """
+        Copy the output stored at slot ``i``. Call with the lock.
+        """
+        if not isinstance(self._output_shapes, dict):
+            return self._arrays['out:'][i].copy()
+        y = {}
+        for key, shape in self._output_shapes.items():
+            y[key] = None if shape is None else self._arrays['out:' + key][i].copy()
+        return y
+
+    def _set_output(self, i, y):
+        """
+        Write the output ``y`` at slot ``i``. Call with the lock.
+        """
+        if not isinstance(self._output_shapes, dict):
+            self._arrays['out:'][i] = y
+            return
+        for key, shape in self._output_shapes.items():
+            if shape is not None:
+                self._arrays['out:' + key][i] = y[key]
+
+    def _claim(self, x, h):
+        """
+        Claim a slot for ``x`` and return its stamp. Call with the lock.
+        """
+        header = self._arrays['header']
+        stamp = int(header[0])
+        i = stamp % self._max_size
+        self._arrays['stamps'][i] = stamp
+        self._arrays['ready'][i] = 0
+        self._arrays['inputs'][i] = x
+        self._arrays['hashes'][i] = h
+        header[0] += 1
+        return stamp
+
+    def __call__(self, *args, **kw):
+        """
+        Call the function at x.
+        """
+        x = np.asarray(args[0], dtype=float).reshape(-1)
+        h = _digest(x)
+        header = self._arrays['header']
+        stamps = self._arrays['stamps']
+        self._count += 1
+        with self._lock:
+            header[1] += 1
+        t0 = time.perf_counter()
+        while True:
+            with self._lock:
+                i = self._find(x, h)
+                if i == -1:
+                    stamp = self._claim(x, h)
+                    break
+                if self._arrays['ready'][i]:
+                    return self._get_output(i)
+            # Another process is evaluating it
+            if (self._wait_timeout is not None
+                and time.perf_counter() - t0 > self._wait_timeout):
+                stamp = None
+                break
+            time.sleep(self._poll_interval)
+        i = None if stamp is None else stamp % self._max_size
+        try:
+            y = self._f(*args, **kw)
+        except BaseException:
+            if i is not None:
+                with self._lock:
+                    if stamps[i] == stamp:
+                        stamps[i] = -1
+            raise
+        self._count_eval += 1
+        with self._lock:
+            header[2] += 1
+            if i is not None and stamps[i] == stamp:
+                self._set_output(i, y)
+                self._arrays['ready'][i] = 1
+        return y
+
+    def submit(self, executor, *args, **kw):
+        """
+        Call the function at x using ``executor``.
+        """
+        return executor.submit(self, *args, **kw)
+
+    async def acall(self, *args, executor=None, **kw):
+        """
+        Call the function at x without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor,
+                                          functools.partial(self, *args, **kw))
+
+    def get_stats(self, entries=False):
+        """
+        Return the counters of all processes as a dictionary.
+        """
+        calls = self.num_calls
+        return {'calls': calls,
+                'misses': self.num_evaluations,
+                'hits': calls - self.num_evaluations,
+                'hit_rate': (1. - self.num_evaluations / calls
+                             if calls > 0 else None),
+                'size': int(min(self._arrays['header'][0], self._max_size)),
+                'max_size': self._max_size}
+
+    @property
+    def num_calls(self):
+        """
+        :getter:    The number of calls made by all processes.
+        """
+        return int(self._arrays['header'][1])
+
+    @property
+    def num_evaluations(self):
+        """
+        :getter:    The number of actual evaluations made by all processes.
+        """
+        return int(self._arrays['header'][2])
+
+    def close(self):
+        """
+        Detach this process from the shared memory.
+        """
+        self._arrays = None
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Destroy the shared memory (only the owner may do this).
+        """
+        assert self._owner
+        self.close()
+        self._shm.unlink()
+        _LOCKS.pop(self._shm.name, None)
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        s = ('Evaluations = ' + str(self.num_calls) +
+             ' (' + str(self.num_evaluations) + ' actual, all processes)')
+        return s
@@ -0,0 +1,77 @@
+"""
+A cached function that exploits the symmetries of the underlying function.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['SymmetricCachedFunction']
+
+
+from concurrent.futures import Future
+from . import CachedFunction
+
+
+class SymmetricCachedFunction(CachedFunction):
+
+    """
+    A cached function that evaluates only canonical inputs.
+
+    ``canonicalize(x)`` must return a tuple ``(c, restore)``, where ``c`` is
+    the canonical representative of the orbit of ``x`` under the symmetries
+    of the function and ``restore(y)`` maps the output ``y`` at ``c`` to the
+    output at ``x``. Only ``c`` is looked up in (and stored to) the cache. So,
+    all the inputs of an orbit share a single evaluation.
+
+    The canonical inputs of an orbit may differ by round-off. Use a
+    tolerance a bit larger than that, e.g., ``input_cache_args={'tol':
+    1e-12}``.
+
+    :param canonicalize:    The function that maps inputs to canonical ones.
+
+    See :class:`vuq.CachedFunction` for the rest of the parameters.
+    """
+
+    def __init__(self, f, canonicalize, **kwargs):
+        """
+        Initialize the object.
+        """
+        super(SymmetricCachedFunction, self).__init__(f, **kwargs)
+        self._canonicalize = canonicalize
+
+    def __call__(self, x, *args, **kw):
+        """
+        Call the function at x.
+        """
+        c, restore = self._canonicalize(x)
+        return restore(super(SymmetricCachedFunction, self).__call__(c, *args,
+                                                                     **kw))
+
+    def submit(self, executor, x, *args, **kw):
+        """
+        Call the function at x using ``executor`` if it must be evaluated.
+        """
+        c, restore = self._canonicalize(x)
+        future = super(SymmetricCachedFunction, self).submit(executor, c,
+                                                             *args, **kw)
+        result = Future()
+
+        def done(future):
+            if future.exception() is not None:
+                result.set_exception(future.exception())
+            else:
+                result.set_result(restore(future.result()))
+
+        future.add_done_callback(done)
+        return result
+
+    async def acall(self, x, *args, executor=None, **kw):
+        """
+        Call the function at x without blocking the event loop.
+        """
+        c, restore = self._canonicalize(x)
+        y = await super(SymmetricCachedFunction, self).acall(
+            c, *args, executor=executor, **kw)
+        return restore(y)
@@ -0,0 +1,159 @@
+"""
+A cached function that extrapolates from nearby cached points.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['taylor_extrapolate', 'TaylorCachedFunction']
+
+
+import numpy as np
+from . import CachedFunction
+
+
+def taylor_extrapolate(y0, dx, order=2):
+    """
+    Extrapolate the output ``y0`` of a model at ``x0`` to ``x0 + dx``.
+
+    The error is estimated by the magnitude of the first term that is left
+    out. For a first order extrapolation this is the Hessian term. For a
+    second order one, we assume that the terms decay geometrically and
+    estimate the next one as ``|t2| * |t2| / |t1|``, where ``t1`` and ``t2``
+    are the first and second order terms. Without a Hessian, the estimate
+    of a first order extrapolation is the first order term itself.
+
+    :param y0:      A dictionary with the keys ``f``, ``f_grad`` and
+                    (optionally) ``f_grad_2`` like the output of
+                    :meth:`vuq.Model._eval()`.
+    :param dx:      The step.
+    :param order:   The order of the extrapolation (1 or 2). The order is
+                    lowered to 1 if there is no Hessian.
+    :returns:       A tuple ``(y, error)`` with the extrapolated output (a
+                    copy of ``y0`` with ``f`` and ``f_grad`` updated) and the
+                    estimated error of each element of ``f``, or
+                    ``(None, None)`` if there is no Jacobian.
+    """
+    assert order in (1, 2)
+    J = y0.get('f_grad')
+    if J is None:
+        return None, None
+    H = y0.get('f_grad_2')
+    f0 = np.asarray(y0['f'])
+    J = np.asarray(J)
+    dx = np.asarray(dx).reshape(-1)
+    t1 = np.dot(J, dx).reshape(f0.shape)
+    y = dict(y0)
+    if H is None:
+        y['f'] = f0 + t1
+        return y, np.abs(t1)
+    H = np.asarray(H)
+    Hdx = np.dot(H, dx)
+    t2 = 0.5 * np.dot(Hdx, dx).reshape(f0.shape)
+    if order == 1:
+        y['f'] = f0 + t1
+        return y, np.abs(t2)
+    n1 = np.linalg.norm(t1)
+    ratio = min(1., np.linalg.norm(t2) / n1) if n1 > 0. else 1.
+    y['f'] = f0 + t1 + t2
+    y['f_grad'] = J + Hdx
+    return y, np.abs(t2) * ratio
+
+
+class TaylorCachedFunction(CachedFunction):
+
+    """
+    A cached function that may answer a miss with a Taylor extrapolation.
+
+    The function must return dictionaries like :meth:`vuq.Model._eval()`.
+    When an input is not in the cache, we look for the nearest cached input
+    ``x0``. If it is within ``radius``, the output at ``x0`` is extrapolated
+    with :func:`vuq.taylor_extrapolate()`. The extrapolation is returned
+    (and it is not cached) if it is accepted. Otherwise, the function is
+    evaluated as usual.
+
+    By default, an extrapolation is accepted if the estimated error of every
+    output is below ``atol + rtol * |f|``. Pass ``accept(y, error)`` to
+    decide otherwise.
+
+    The input cache must be a :class:`vuq.NumpyArrayCache` (the default).
+    With many entries, use ``input_cache_args={'spatial_index': True}`` so
+    that the nearest input is found with a KD-tree.
+
+    :param radius:  The maximum distance of the cached point.
+    :param order:   The order of the extrapolation (1 or 2).
+    :param atol:    The absolute error tolerance.
+    :param rtol:    The relative error tolerance.
+    :param accept:  The function that decides if an extrapolation is
+                    accepted (``None`` for the default).
+
+    See :class:`vuq.CachedFunction` for the rest of the parameters.
+    """
+
+    def __init__(self, f, radius, order=2, atol=0., rtol=1e-3, accept=None,
+                 **kwargs):
+        """
+        Initialize the object.
+        """
+        super(TaylorCachedFunction, self).__init__(f, **kwargs)
+        assert radius >= 0.
+        assert order in (1, 2)
+        assert hasattr(self._input_cache, 'get_nearest')
+        self._radius = radius
+        self._order = order
+        self._atol = atol
+        self._rtol = rtol
+        self._accept = accept
+
+    @property
+    def radius(self):
+        """
+        :getter:    The maximum distance of the cached point.
+        """
+        return self._radius
+
+    def _accepts(self, y, error):
+        """
+        Is the extrapolation ``y`` with estimated error ``error`` accepted?
+        """
+        if self._accept is not None:
+            return self._accept(y, error)
+        return bool(np.all(error <= self._atol + self._rtol * np.abs(y['f'])))
+
+    def approximate(self, x):
+        """
+        Return an extrapolation of the function at ``x`` from the nearest
+        cached point.
+
+        :returns:   A tuple ``(y, error)`` or ``(None, None)`` if there is no
+                    cached point within ``radius`` or the extrapolation is
+                    rejected.
+        """
+        x = np.asarray(x)
+        with self._lock:
+            i, d = self._input_cache.get_nearest(x)
+            if i == -1 or d > self._radius:
+                return None, None
+            dx = x.reshape(-1) - np.reshape(self._input_cache[i], -1)
+            y, error = taylor_extrapolate(self._output_cache[i], dx,
+                                          order=self._order)
+            if y is None or not self._accepts(y, error):
+                return None, None
+            self._input_cache.policy.touch(i)
+            return y, error
+
+    def _begin(self, x, order=2):
+        y, future, owner = super(TaylorCachedFunction, self)._begin(x, order)
+        if not owner:
+            return y, future, owner
+        y, _ = self.approximate(x)
+        if y is None:
+            return None, future, True
+        # Resolve the pending evaluation, the waiters get the extrapolation
+        with self._lock:
+            self._stats.record_approx()
+            self._pending.pop(self._pending_key(x, order), None)
+        future.set_result(y)
+        return y, None, False
@@ -10,12 +10,51 @@ Date:
 """
 
 
-__all__ = ['regularize_array', 'make_vector', 'call_many', 'view_as_column',
-           'euclidean_distance']
+__all__ = ['regularize_array', 'make_vector', 'call_many', 'iter_chunks',
+           'stream_many', 'view_as_column', 'euclidean_distance', 'nbytes_of']
 
 
+import sys
+import collections
+import concurrent.futures
 import numpy as np
-from scipy.spatial.distance import cdist
+
+
+# The function evaluated by the workers of a process pool
+_WORKER_FUNC = None
+
+
+def _init_worker(func):
+    """
+    Install ``func`` in a worker of a process pool.
+    """
+    global _WORKER_FUNC
+    _WORKER_FUNC = func
+
+
+def _call_chunk(x, vectorized=False):
+    """
+    Evaluate the function installed in this worker at the rows of ``x``.
+    """
+    return _call_func_chunk(_WORKER_FUNC, x, vectorized=vectorized)
+
+
+def _call_func_chunk(func, x, start=0, store=None, vectorized=False):
+    """
+    Evaluate ``func`` at the rows of ``x`` (or at ``x`` if ``vectorized``).
+
+    If ``store`` is given, the output of row ``i`` goes to
+    ``store(start + i, y)`` instead of the returned list.
+    """
+    if vectorized:
+        if store is None:
+            return [func(x)]
+        store(start, func(x))
+        return
+    if store is None:
+        return [func(x[i, :]) for i in range(x.shape[0])]
+    for i in range(x.shape[0]):
+        store(start + i, func(x[i, :]))
 
 
 def regularize_array(x):
@@ -48,24 +87,199 @@ def make_vector(x):
     return np.array(x).flatten()
 
 
-def call_many(x, func, return_numpy=True):
+def _consume(results, starts, store):
+    """
+    Pass the chunks of ``results`` to ``store`` as they arrive or return
+    them as a list if ``store`` is ``None``.
+    """
+    if store is None:
+        return list(results)
+    for start, r in zip(starts, results):
+        for i, y in enumerate(r):
+            store(start + i, y)
+
+
+def call_many(x, func, return_numpy=True, executor=None, num_workers=None,
+              chunk_size=None, store=None, vectorized=False):
     """
     Assuming the ``x`` is a 2D array, evaluate ``func(x[i, :])`` for each ``i``
     and return the result as a numpy array.
 
+    The rows may be evaluated in parallel. They are split in chunks and each
+    task evaluates a chunk. The outputs are always in the order of the rows.
+    With ``executor='process'``, a pool is started for the call and ``func``
+    is sent to each worker once, when it starts. With an executor object,
+    ``func`` is sent with every chunk.
+
     :param x:               The evaluation points.
     :type x:                :class:`numpy.ndarray`
     :param func:            The function.
     :param return_numpy:    If ``True``, then it puts all the outputs in a numpy array.
                             Otherwise, it returns a list.
+    :param executor:        ``None`` or ``'serial'``, ``'thread'``, ``'process'``
+                            or a :class:`concurrent.futures.Executor`.
+    :param num_workers:     The number of workers of the pool (``None`` for the
+                            default of :mod:`concurrent.futures`).
+    :param chunk_size:      The number of rows per task. If ``None``, each
+                            worker gets about four chunks.
+    :param store:           If given, the output of row ``i`` is passed to
+                            ``store(i, y)`` as soon as it is available (by the
+                            worker thread for ``'thread'``) and nothing is
+                            returned. Use it to write the outputs in place.
+    :param vectorized:      If ``True``, ``func`` takes a 2D array and
+                            evaluates all its rows at once. It is called once
+                            per chunk (serially, once for all the rows unless
+                            ``chunk_size`` is given) and ``store(i, y)`` gets
+                            the output of the chunk starting at row ``i``.
+                            Without ``store``, the list of the outputs of the
+                            chunks is returned.
     """
+    # Before the shortcut for a single input, so that a wrong executor fails
+    # on small inputs too
+    if not (executor in (None, 'serial', 'thread', 'process')
+            or isinstance(executor, concurrent.futures.Executor)):
+        raise ValueError('Unknown executor: ' + str(executor))
     x = regularize_array(x)
-    out = [func(x[i, :]) for i in range(x.shape[0])]
+    n = x.shape[0]
+    if executor is None or executor == 'serial' or n <= 1:
+        if vectorized:
+            size = n if chunk_size is None else chunk_size
+            out = []
+            for i in range(0, n, max(size, 1)):
+                r = _call_func_chunk(func, x[i:i + size], i, store, True)
+                if store is None:
+                    out += r
+            if store is not None:
+                return
+            return out
+        if store is not None:
+            _call_func_chunk(func, x, store=store)
+            return
+        out = [func(x[i, :]) for i in range(n)]
+    else:
+        if chunk_size is None:
+            workers = num_workers
+            if workers is None:
+                workers = getattr(executor, '_max_workers', None) or 4
+            chunk_size = max(1, -(-n // (4 * workers)))
+        starts = list(range(0, n, chunk_size))
+        chunks = [x[i:i + chunk_size] for i in starts]
+        if executor == 'thread':
+            with concurrent.futures.ThreadPoolExecutor(num_workers) as pool:
+                m = len(chunks)
+                if store is not None:
+                    # The workers write their rows themselves
+                    list(pool.map(_call_func_chunk, [func] * m, chunks,
+                                  starts, [store] * m, [vectorized] * m))
+                    return
+                results = pool.map(_call_func_chunk, [func] * m, chunks,
+                                   starts, [None] * m, [vectorized] * m)
+                results = list(results)
+        elif executor == 'process':
+            with concurrent.futures.ProcessPoolExecutor(
+                    num_workers, initializer=_init_worker,
+                    initargs=(func, )) as pool:
+                results = pool.map(_call_chunk, chunks,
+                                   [vectorized] * len(chunks))
+                results = _consume(results, starts, store)
+        else:
+            m = len(chunks)
+            results = executor.map(_call_func_chunk, [func] * m, chunks,
+                                   [0] * m, [None] * m, [vectorized] * m)
+            results = _consume(results, starts, store)
+        if store is not None:
+            return
+        out = [y for r in results for y in r]
+        if vectorized:
+            return out
     if return_numpy:
         return np.array(out)
     return out
 
 
+def iter_chunks(x, chunk_size, skip=()):
+    """
+    Iterate over the chunks of ``chunk_size`` rows of ``x``.
+
+    The rows are read only when a chunk is reached, so ``x`` may be an
+    :class:`numpy.memmap` (or the name of a ``.npy`` file, which is memory
+    mapped) that does not fit in memory.
+
+    :param skip:    The indices of the chunks to skip.
+    :returns:       A generator of ``(start, chunk)``, where ``chunk`` is an
+                    array with the rows ``start`` to ``start + chunk_size``.
+    """
+    if isinstance(x, str):
+        x = np.load(x, mmap_mode='r')
+    assert chunk_size >= 1
+    skip = set(skip)
+    for k, start in enumerate(range(0, x.shape[0], chunk_size)):
+        if k not in skip:
+            yield start, regularize_array(np.array(x[start:start + chunk_size]))
+
+
+def stream_many(x, func, chunk_size=1024, executor=None, num_workers=None,
+                vectorized=False, skip=()):
+    """
+    Evaluate ``func`` at the rows of ``x`` chunk by chunk.
+
+    This is :func:`vuq.call_many()` for inputs and outputs that do not fit
+    in memory. The chunks are read lazily (see :func:`vuq.iter_chunks()`)
+    and their outputs are yielded in order as soon as they are ready. With
+    an executor, at most ``2 * num_workers`` chunks are read ahead. So, the
+    memory taken is bounded no matter how many rows ``x`` has.
+
+    :param executor:    ``None``, ``'serial'``, ``'thread'``, ``'process'`` or
+                        a :class:`concurrent.futures.Executor`, see
+                        :func:`vuq.call_many()`.
+    :param vectorized:  If ``True``, ``func`` evaluates a whole chunk at once.
+    :param skip:        The indices of the chunks to skip (e.g., those
+                        already evaluated).
+    :returns:           A generator of ``(start, y)``, where ``y`` is the list
+                        of the outputs of the rows of the chunk (or the
+                        output of ``func`` if ``vectorized``).
+    """
+    chunks = iter_chunks(x, chunk_size, skip=skip)
+    if executor is None or executor == 'serial':
+        for start, chunk in chunks:
+            y = _call_func_chunk(func, chunk, vectorized=vectorized)
+            yield start, y[0] if vectorized else y
+        return
+    if executor == 'thread':
+        pool = concurrent.futures.ThreadPoolExecutor(num_workers)
+    elif executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(
+            num_workers, initializer=_init_worker, initargs=(func, ))
+    elif isinstance(executor, concurrent.futures.Executor):
+        pool = executor
+    else:
+        raise ValueError('Unknown executor: ' + str(executor))
+    workers = num_workers or getattr(pool, '_max_workers', None) or 4
+    pending = collections.deque()
+    try:
+        for start, chunk in chunks:
+            if executor == 'process':
+                future = pool.submit(_call_chunk, chunk, vectorized)
+            else:
+                future = pool.submit(_call_func_chunk, func, chunk, 0, None,
+                                     vectorized)
+            pending.append((start, future))
+            # Do not read more chunks than the workers can take
+            while len(pending) >= 2 * workers:
+                start, future = pending.popleft()
+                y = future.result()
+                yield start, y[0] if vectorized else y
+        while pending:
+            start, future = pending.popleft()
+            y = future.result()
+            yield start, y[0] if vectorized else y
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if pool is not executor:
+            pool.shutdown()
+
+
 def view_as_column(x):
     """
     View x as a column vector.
@@ -77,8 +291,42 @@ def view_as_column(x):
     return x
 
 
+def _cdist(XA, XB, *args, **kwargs):
+    """
+    Call :func:`scipy.spatial.distance.cdist`.
+
+    :mod:`scipy.spatial` takes long to import, so it is imported the first
+    time a distance is needed. Then, this function replaces itself with
+    :func:`scipy.spatial.distance.cdist`. Call it as ``_utils._cdist()``
+    from other modules so that they see the replacement.
+    """
+    global _cdist
+    from scipy.spatial.distance import cdist
+    _cdist = cdist
+    return cdist(XA, XB, *args, **kwargs)
+
+
 def euclidean_distance(x, y):
     """
     Returns the Euclidean distance between two numpy arrays.
     """
-    return cdist(regularize_array(x), regularize_array(y))
+    return _cdist(regularize_array(x), regularize_array(y))
+
+
+def nbytes_of(value):
+    """
+    Return the number of bytes taken by ``value``.
+
+    It counts the data of numpy arrays and of dictionaries (or objects that
+    work like them), lists and tuples of them (e.g., the output of a
+    :class:`vuq.Model`). Anything else counts as its python size.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict) or hasattr(value, 'items'):
+        return sum(nbytes_of(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes_of(v) for v in value)
+    return sys.getsizeof(value)
@@ -11,11 +11,9 @@ Date:
 
 import numpy as np
 import fipy as fp
-from transport_model import *
-import sys
-sys.path.insert(0,'../')
-from vuq import Model
-from vuq import view_as_column
+from .transport_model import *
+from .. import Model
+from .. import view_as_column
 
 class ContaminantAdvectionModel(Model):
     """
@@ -29,10 +27,10 @@ class ContaminantAdvectionModel(Model):
         """
         super(ContaminantAdvectionModel, self).__init__(2, 40, name=name)
 
-    def _eval(self, xs):
+    def _eval(self, xs, order=2):
         """
-        Solves the advection equation for u and its derivatives for a given 
-        source location xs. 
+        Solves the advection equation for u and its derivatives up to
+        ``order`` for a given source location xs.
         """
         xs = view_as_column(xs)
         assert xs.shape[0] == 2
@@ -43,18 +41,22 @@ class ContaminantAdvectionModel(Model):
         mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
         vx, vy = make_V_field(mesh)
         u = f(xs[:,0], mesh, vx, vy)
-        du1 = df(xs[:,0], mesh, vx, vy, 1)
-        du2 = df(xs[:,0], mesh, vx, vy, 2)
-        d2u11 = df2(xs[:,0], mesh, vx, vy, 1, 1)
-        d2u22 = df2(xs[:,0], mesh, vx, vy, 1, 1)
-        d2u12 = df2(xs[:,0], mesh, vx, vy, 1, 2)
-        dU = np.hstack([view_as_column(du1), view_as_column(du2)])
-        d2U = np.hstack([view_as_column(d2u11), view_as_column(d2u12), view_as_column(d2u12), view_as_column(d2u22)])
-        d2U = d2U.reshape((d2U.shape[0], 2, 2))
         state = {}
         state['f'] = u #view_as_column(u)
-        state['f_grad'] = dU
-        state['f_grad_2'] = d2U
+        state['f_grad'] = None
+        state['f_grad_2'] = None
+        if order >= 1:
+            du1 = df(xs[:,0], mesh, vx, vy, 1)
+            du2 = df(xs[:,0], mesh, vx, vy, 2)
+            dU = np.hstack([view_as_column(du1), view_as_column(du2)])
+            state['f_grad'] = dU
+        if order >= 2:
+            d2u11 = df2(xs[:,0], mesh, vx, vy, 1, 1)
+            d2u22 = df2(xs[:,0], mesh, vx, vy, 2, 2)
+            d2u12 = df2(xs[:,0], mesh, vx, vy, 1, 2)
+            d2U = np.hstack([view_as_column(d2u11), view_as_column(d2u12), view_as_column(d2u12), view_as_column(d2u22)])
+            d2U = d2U.reshape((d2U.shape[0], 2, 2))
+            state['f_grad_2'] = d2U
         return state
     
     def _eval_u(self, xs):
@@ -13,7 +13,6 @@ Date:
 import numpy as np
 import fipy as fp
 from random import *
-import matplotlib.pyplot as plt
 
 
 
@@ -0,0 +1,21 @@
+"""
+Benchmarks of the forward models and the caches.
+
+Run them (from the directory that contains :mod:`demos`) with::
+
+    python -m demos.benchmarks -o results.json \
+        --baseline demos/benchmarks/baseline.json
+
+The file ``baseline.json`` holds the results of a run on the machine
+described in it. The times depend on the machine, so record a baseline on
+yours before making changes with::
+
+    python -m demos.benchmarks -o baseline.json
+
+Date:
+    10/18/2026
+
+"""
+
+from ._benchmark import *
+from ._suite import *
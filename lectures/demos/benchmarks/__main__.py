@@ -0,0 +1,65 @@
+"""
+Run the benchmarks from the command line.
+
+Date:
+    10/18/2026
+
+"""
+
+
+import sys
+import argparse
+from . import make_benchmarks
+from . import run_benchmarks
+from . import save_results
+from . import load_results
+from . import compare_results
+
+
+def main(argv=None):
+    """
+    Run the benchmarks and compare them with a baseline.
+
+    :returns:   1 if a benchmark has regressed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='python -m demos.benchmarks',
+                                     description=main.__doc__.split('\n')[1])
+    parser.add_argument('-k', '--select', action='append',
+                        help='run only the benchmarks whose names match this '
+                             'shell-style pattern (can be repeated)')
+    parser.add_argument('-o', '--output',
+                        help='write the results to this JSON file')
+    parser.add_argument('--baseline',
+                        help='compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='the allowed relative slowdown (default: 0.25)')
+    parser.add_argument('--key', default='min',
+                        help='the time to compare (default: min)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=[1, 16, 64])
+    parser.add_argument('--diffusion-batch-sizes', type=int, nargs='+',
+                        default=[1, 4])
+    args = parser.parse_args(argv)
+    benchmarks = make_benchmarks(
+        batch_sizes=args.batch_sizes,
+        diffusion_batch_sizes=args.diffusion_batch_sizes)
+    results = run_benchmarks(benchmarks, select=args.select, verbose=True)
+    if args.output is not None:
+        save_results(results, args.output)
+    if args.baseline is None:
+        return 0
+    comparison = compare_results(results, load_results(args.baseline),
+                                 tolerance=args.tolerance, key=args.key)
+    print('\nComparison with ' + args.baseline + ':')
+    regressions = 0
+    for name in sorted(comparison):
+        c = comparison[name]
+        print('%-50s %8.3fx%s' % (name, c['ratio'],
+                                  '  REGRESSION' if c['regression'] else ''))
+        regressions += c['regression']
+    print(str(regressions) + ' regression(s)')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
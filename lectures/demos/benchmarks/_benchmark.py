@@ -0,0 +1,113 @@
+"""
+Timing a function.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['Benchmark']
+
+
+import time
+import numpy as np
+
+
+class Benchmark(object):
+
+    """
+    A named timing of a function.
+
+    ``setup()`` prepares everything the function needs (e.g., makes a model)
+    and returns the function, which takes no arguments. The function is
+    called ``warmup`` times without timing and then ``repeat`` times
+    ``number`` calls are timed. The result is the time per call. If
+    ``number`` is ``None``, it is the smallest power of two for which the
+    calls take at least ``min_time`` seconds (like :mod:`timeit`), which
+    makes the timings of fast functions less noisy.
+
+    If ``setup()`` or the function raise one of the exceptions in
+    ``skip_on`` (e.g., the data of a model are missing), the benchmark is
+    skipped.
+
+    :param name:        The name of the benchmark.
+    :param setup:       The function that returns the function to time.
+    :param repeat:      The number of timings.
+    :param number:      The number of calls in a timing.
+    :param warmup:      The number of calls before the timings.
+    :param min_time:    The least duration of a timing if ``number`` is
+                        ``None``.
+    :param skip_on:     The exceptions that skip the benchmark.
+    """
+
+    # A name for the object
+    __name__ = None
+
+    def __init__(self, name, setup, repeat=5, number=1, warmup=1,
+                 min_time=0.2, skip_on=(ImportError, IOError)):
+        """
+        Initialize the object.
+        """
+        assert repeat >= 1
+        assert number is None or number >= 1
+        self.__name__ = name
+        self._setup = setup
+        self._repeat = repeat
+        self._number = number
+        self._warmup = warmup
+        self._min_time = min_time
+        self._skip_on = skip_on
+
+    @staticmethod
+    def _time(func, number):
+        """
+        Return the time of ``number`` calls of ``func``.
+        """
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - t0
+
+    @property
+    def name(self):
+        """
+        :getter:    The name of the benchmark.
+        """
+        return self.__name__
+
+    def run(self):
+        """
+        Run the benchmark.
+
+        :returns:   A dictionary with the ``min``, ``median``, ``mean`` and
+                    ``max`` time per call (in seconds) over the timings and
+                    the ``repeat`` and ``number`` of calls, or with the
+                    reason the benchmark was ``skipped``.
+        """
+        times = np.empty(self._repeat)
+        try:
+            func = self._setup()
+            for _ in range(self._warmup):
+                func()
+            number = self._number
+            if number is None:
+                number = 1
+                while self._time(func, number) < self._min_time:
+                    number *= 2
+            for i in range(self._repeat):
+                times[i] = self._time(func, number) / number
+        except self._skip_on as e:
+            return {'skipped': type(e).__name__ + ': ' + str(e)}
+        return {'min': float(times.min()),
+                'median': float(np.median(times)),
+                'mean': float(times.mean()),
+                'max': float(times.max()),
+                'repeat': self._repeat,
+                'number': number}
+
+    def __str__(self):
+        """
+        Return a string representation of the object.
+        """
+        return 'Benchmark: ' + self.__name__
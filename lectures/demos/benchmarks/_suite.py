@@ -0,0 +1,311 @@
+"""
+The benchmarks of the forward models and the caches.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['make_benchmarks', 'run_benchmarks', 'save_results',
+           'load_results', 'compare_results']
+
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import platform
+import subprocess
+import numpy as np
+from .. import Model
+from .. import CachedFunction
+from .. import NumpyArrayCache
+from ..catalysis import CatalysisModel
+from ._benchmark import Benchmark
+
+
+# A typical input of each model
+_CATALYSIS_X = np.array([0.0216, 0.0292, 0.0219, 0.0021, 0.0048])
+_SOURCE_X = np.array([0.3, 0.6])
+
+
+class _PerPointCatalysisModel(CatalysisModel):
+
+    """
+    The catalysis model without its batched evaluation.
+    """
+
+    _eval_batch = Model._eval_batch
+
+
+def _import_benchmark(module):
+    """
+    Time starting a python process that imports ``module`` (nothing if
+    ``None``), i.e., what a worker process pays before it can evaluate.
+    """
+    def setup():
+        # The directory that contains the demos package
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [p for p in [env.get('PYTHONPATH')] if p])
+        code = 'pass' if module is None else 'import ' + module
+        return lambda: subprocess.run([sys.executable, '-c', code], env=env,
+                                      check=True)
+    return Benchmark('import/' + ('python' if module is None else module),
+                     setup, repeat=5,
+                     skip_on=(ImportError, IOError,
+                              subprocess.CalledProcessError))
+
+
+def _eval_benchmark(name, make_model, x, repeat, warmup):
+    """
+    Time a single evaluation of the model made by ``make_model()`` at ``x``.
+    """
+    def setup():
+        model = make_model()
+        return lambda: model._eval(x)
+    return Benchmark('eval/' + name, setup, repeat=repeat, warmup=warmup)
+
+
+def _call_benchmark(name, make_model, x0, batch_size, order):
+    """
+    Time the evaluation of ``batch_size`` inputs around ``x0`` with
+    :meth:`vuq.Model.__call__()`.
+    """
+    def setup():
+        model = make_model()
+        rng = np.random.RandomState(0)
+        X = x0 * (1. + 0.1 * rng.rand(batch_size, x0.shape[0]))
+        return lambda: model(X, order=order)
+    return Benchmark('call/' + name + '/order_' + str(order) + '/batch_'
+                     + str(batch_size), setup, repeat=3, number=None)
+
+
+def _make_queries(num_queries, num_input, hit_ratio, rng):
+    """
+    Make inputs of which a fraction ``hit_ratio`` repeat one of the previous
+    ``64`` distinct inputs.
+    """
+    X = np.empty((num_queries, num_input))
+    num_new = 0
+    for i in range(num_queries):
+        if num_new > 0 and rng.rand() < hit_ratio:
+            X[i] = X[rng.randint(max(0, i - 64), i)]
+        else:
+            X[i] = rng.rand(num_input)
+            num_new += 1
+    return X
+
+
+def _cached_function_benchmark(hit_ratio, num_queries=1000, max_size=256):
+    """
+    Time a :class:`vuq.CachedFunction` of a cheap function on inputs with a
+    given fraction of repeats.
+    """
+    def setup():
+        X = _make_queries(num_queries, 5, hit_ratio, np.random.RandomState(0))
+
+        def run():
+            f = CachedFunction(np.sum,
+                               input_cache_args={'max_size': max_size})
+            for x in X:
+                f(x)
+        return run
+    return Benchmark('cache/cached_function/hit_' + str(hit_ratio), setup,
+                     repeat=5, number=None)
+
+
+def _array_cache_benchmark(size, hit, num_queries=100):
+    """
+    Time the lookups of a full :class:`vuq.NumpyArrayCache` of ``size``
+    entries.
+    """
+    def setup():
+        rng = np.random.RandomState(0)
+        cache = NumpyArrayCache(max_size=size)
+        for x in rng.rand(size, 5):
+            cache.append(x)
+        if hit:
+            X = np.array([cache[i] for i in rng.randint(0, size, num_queries)])
+        else:
+            X = rng.rand(num_queries, 5)
+
+        def run():
+            for x in X:
+                cache.get_index_of(x)
+        return run
+    return Benchmark('cache/numpy_array_cache/' + ('hit' if hit else 'miss')
+                     + '/size_' + str(size), setup, repeat=5, number=None)
+
+
+def make_benchmarks(batch_sizes=(1, 16, 64), hit_ratios=(0., 0.5, 0.9),
+                    cache_sizes=(256, 4096), diffusion_batch_sizes=(1, 4)):
+    """
+    Make the benchmarks of the forward models and the caches.
+
+    The names of the benchmarks are:
+
+        + ``import/<module>``: Starting python and importing a module of
+          :mod:`demos` (``import/python`` starts python only).
+        + ``eval/<model>``: A single ``_eval()`` of a model.
+        + ``call/<model>/order_<k>/batch_<n>``: :meth:`vuq.Model.__call__()`
+          at ``n`` inputs for ``k`` equal to 0 and 2 (``catalysis`` uses the
+          batched evaluation, ``catalysis_per_point`` does not). The
+          diffusion models use the sizes ``diffusion_batch_sizes``, since a
+          solve is slow.
+        + ``cache/cached_function/hit_<h>``: 1000 calls of a
+          :class:`vuq.CachedFunction`, a fraction ``h`` of which are repeats.
+        + ``cache/numpy_array_cache/<hit|miss>/size_<n>``: 100 lookups in a
+          full :class:`vuq.NumpyArrayCache` of ``n`` entries.
+
+    The fipy models are imported only when their benchmarks run.
+
+    :returns:   A list of :class:`vuq.benchmarks.Benchmark`.
+    """
+    def diffusion(name):
+        def make_model():
+            from .. import diffusion
+            return getattr(diffusion, name)()
+        return make_model
+
+    def advection():
+        from ..advection import ContaminantAdvectionModel
+        return ContaminantAdvectionModel()
+
+    benchmarks = [
+        _import_benchmark(None),
+        _import_benchmark('demos'),
+        _import_benchmark('demos.catalysis'),
+        _import_benchmark('demos.diffusion'),
+        _eval_benchmark('catalysis', CatalysisModel, _CATALYSIS_X, 5, 1),
+        _eval_benchmark('diffusion', diffusion('ContaminantTransportModel'),
+                        _SOURCE_X, 3, 0),
+        _eval_benchmark('diffusion_left',
+                        diffusion('ContaminantTransportModelLeft'),
+                        _SOURCE_X, 3, 0),
+        _eval_benchmark('diffusion_upperleft',
+                        diffusion('ContaminantTransportModelUpperLeft'),
+                        _SOURCE_X, 3, 0),
+        _eval_benchmark('diffusion_centers',
+                        diffusion('ContaminantTransportModelCenter'),
+                        _SOURCE_X, 3, 0),
+        _eval_benchmark('advection', advection, _SOURCE_X, 1, 0)]
+    for order in (0, 2):
+        for n in batch_sizes:
+            benchmarks.append(_call_benchmark('catalysis', CatalysisModel,
+                                              _CATALYSIS_X, n, order))
+            benchmarks.append(_call_benchmark('catalysis_per_point',
+                                              _PerPointCatalysisModel,
+                                              _CATALYSIS_X, n, order))
+        for n in diffusion_batch_sizes:
+            benchmarks.append(_call_benchmark(
+                'diffusion', diffusion('ContaminantTransportModel'),
+                _SOURCE_X, n, order))
+            benchmarks.append(_call_benchmark(
+                'diffusion_centers',
+                diffusion('ContaminantTransportModelCenter'), _SOURCE_X, n,
+                order))
+    for h in hit_ratios:
+        benchmarks.append(_cached_function_benchmark(h))
+    for size in cache_sizes:
+        for hit in (True, False):
+            benchmarks.append(_array_cache_benchmark(size, hit))
+    return benchmarks
+
+
+def run_benchmarks(benchmarks=None, select=None, verbose=False):
+    """
+    Run benchmarks.
+
+    :param benchmarks:  A list of :class:`vuq.benchmarks.Benchmark` (those of
+                        :func:`vuq.benchmarks.make_benchmarks()` if ``None``).
+    :param select:      A list of shell-style patterns. Only the benchmarks
+                        whose names match one of them run.
+    :param verbose:     Print the result of each benchmark?
+    :returns:           A dictionary with the description of the machine
+                        (``'meta'``) and the result of each benchmark by name
+                        (``'results'``, see
+                        :meth:`vuq.benchmarks.Benchmark.run()`).
+    """
+    if benchmarks is None:
+        benchmarks = make_benchmarks()
+    results = {}
+    for b in benchmarks:
+        if select and not any(fnmatch.fnmatch(b.name, p) for p in select):
+            continue
+        results[b.name] = r = b.run()
+        if verbose:
+            if 'skipped' in r:
+                print(b.name + ': skipped (' + r['skipped'] + ')')
+            else:
+                print(b.name + ': ' + '%.4g' % r['min'] + ' s')
+            sys.stdout.flush()
+    meta = {'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine()}
+    return {'meta': meta, 'results': results}
+
+
+def save_results(results, filename):
+    """
+    Write the results of :func:`vuq.benchmarks.run_benchmarks()` to a JSON
+    file.
+    """
+    with open(filename, 'w') as fd:
+        json.dump(results, fd, indent=2, sort_keys=True)
+
+
+def load_results(filename):
+    """
+    Read the results written by :func:`vuq.benchmarks.save_results()`.
+    """
+    with open(filename, 'r') as fd:
+        return json.load(fd)
+
+
+def compare_results(results, baseline, tolerance=0.25, tolerances=None,
+                    key='min'):
+    """
+    Compare the results of the benchmarks with a baseline.
+
+    A benchmark has regressed if its time is larger than that of the
+    baseline by more than a fraction ``tolerance``. Only the benchmarks that
+    ran in both are compared.
+
+    :param results:     The results of
+                        :func:`vuq.benchmarks.run_benchmarks()`.
+    :param baseline:    The results to compare with.
+    :param tolerance:   The allowed relative slowdown.
+    :param tolerances:  A dictionary of shell-style patterns to the allowed
+                        relative slowdown of the benchmarks that match them.
+                        It overrides ``tolerance``.
+    :param key:         The time to compare (``'min'``, ``'median'``, ...).
+    :returns:           A dictionary by benchmark name of dictionaries with
+                        the ``'baseline'`` and ``'current'`` times, their
+                        ``'ratio'``, the ``'tolerance'`` and whether it is a
+                        ``'regression'``.
+    """
+    current = results['results']
+    base = baseline['results']
+    comparison = {}
+    for name in current:
+        if (name not in base or key not in current[name]
+                or key not in base[name]):
+            continue
+        tol = tolerance
+        for pattern, t in (tolerances or {}).items():
+            if fnmatch.fnmatch(name, pattern):
+                tol = t
+        ratio = current[name][key] / base[name][key]
+        comparison[name] = {'baseline': base[name][key],
+                            'current': current[name][key],
+                            'ratio': ratio,
+                            'tolerance': tol,
+                            'regression': ratio > 1. + tol}
+    return comparison
@@ -13,9 +13,11 @@ Date:
 import numpy as np
 from .model_1 import *
 from .model_2 import *
+from .batch import *
 import sys
 from .. import Model
 from .. import view_as_column
+from .. import span
 
 
 
@@ -24,6 +26,9 @@ class CatalysisModel(Model):
     A class representing the forward model of the catalysis problem.
     """
 
+    # The number of points whose second derivatives are computed together
+    _BATCH_SIZE = 64
+
     def __init__(self, name='Catalysis model'):
         """
         Initialize the object
@@ -31,9 +36,10 @@ class CatalysisModel(Model):
         #self._kappa = x
         super(CatalysisModel, self).__init__(5, 35, name=name)
 
-    def _eval(self, x):
+    def _eval(self, x, order=2):
         """
-        Solves the dynamical system for given parameters x.
+        Solves the dynamical system for given parameters x and its
+        sensitivities up to ``order``.
         """
         x = view_as_column(x)
         # Points where the solution will be evaluated
@@ -43,17 +49,55 @@ class CatalysisModel(Model):
         y0 = np.array([500., 0., 0., 0., 0., 0.])
         y0 = view_as_column(y0)
         assert x.shape[0] == 5
-        sol = f(x[:,0], y0[:,0], t[:,0])
-        J = df(x[:,0], y0[:,0], t[:,0])
-        H = df2(x[:,0], y0[:,0], t[:,0])
-        y = np.delete(sol.reshape((7,6)), 2, 1).flatten() # The 3rd species is unobserved
-        dy = np.array([np.delete(J[:,i].reshape((7,6)), 2, 1).reshape(35) for i in range(J.shape[1])]) # Delete the 3rd species
-        d2y = np.zeros((35, H.shape[1], H.shape[2]))
-        for i in range(H.shape[1]):
-            for j in range(H.shape[2]):
-                d2y[:,i,j]= np.delete(H[:,i,j].reshape((7,6)), 2, 1).reshape(35) # Delete the 3rd species
+        with span('f'):
+            sol = f(x[:,0], y0[:,0], t[:,0])
+        with span('reshape'):
+            y = np.delete(sol.reshape((7,6)), 2, 1).flatten() # The 3rd species is unobserved
         state = {}
         state['f'] = y
-        state['f_grad'] = dy.T
-        state['f_grad_2'] = d2y
+        state['f_grad'] = None
+        state['f_grad_2'] = None
+        if order >= 1:
+            with span('df'):
+                J = df(x[:,0], y0[:,0], t[:,0])
+            with span('reshape'):
+                dy = np.array([np.delete(J[:,i].reshape((7,6)), 2, 1).reshape(35) for i in range(J.shape[1])]) # Delete the 3rd species
+            state['f_grad'] = dy.T
+        if order >= 2:
+            with span('df2'):
+                H = df2(x[:,0], y0[:,0], t[:,0])
+            with span('reshape'):
+                d2y = np.zeros((35, H.shape[1], H.shape[2]))
+                for i in range(H.shape[1]):
+                    for j in range(H.shape[2]):
+                        d2y[:,i,j]= np.delete(H[:,i,j].reshape((7,6)), 2, 1).reshape(35) # Delete the 3rd species
+            state['f_grad_2'] = d2y
+        return state
+
+    def _eval_batch(self, X, order=2):
+        """
+        Solves the dynamical system for all the rows of X in one go using
+        matrix exponentials. The points are processed in blocks of
+        ``_BATCH_SIZE`` to bound the memory of the second derivatives.
+        """
+        t = np.array([0., 30., 60., 90., 120., 150., 180.])
+        y0 = np.array([500., 0., 0., 0., 0., 0.])
+        assert X.shape[1] == 5
+        n = X.shape[0]
+        obs = [0, 1, 3, 4, 5] # The 3rd species is unobserved
+        state = {}
+        with span('f_batch'):
+            state['f'] = f_batch(X, y0, t)[:, :, obs].reshape((n, 35))
+        state['f_grad'] = None
+        state['f_grad_2'] = None
+        if order >= 1:
+            with span('df_batch'):
+                state['f_grad'] = df_batch(X, y0, t)[:, :, obs].reshape((n, 35, 5))
+        if order >= 2:
+            d2y = np.empty((n, 35, 5, 5))
+            for i in range(0, n, self._BATCH_SIZE):
+                with span('df2_batch'):
+                    H = df2_batch(X[i:i + self._BATCH_SIZE], y0, t)
+                d2y[i:i + self._BATCH_SIZE] = H[:, :, obs].reshape((-1, 35, 5, 5))
+            state['f_grad_2'] = d2y
         return state
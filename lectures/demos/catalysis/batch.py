@@ -0,0 +1,106 @@
+"""
+Evaluates the catalysis model at many parameters at once.
+
+The system is linear, dy/dt = A(kappa) y, and A is linear in kappa. So,
+y(t) = exp(A t) y0 and the derivatives of exp(A t) with respect to kappa are
+blocks of the exponentials of block triangular matrices (Van Loan, 1978).
+All the exponentials of a population are computed together.
+
+Date:
+    10/18/2026
+"""
+
+
+import numpy as np
+from scipy.linalg import expm
+from .model_1 import make_A
+
+
+__all__ = ['make_A_batch', 'f_batch', 'df_batch', 'df2_batch']
+
+
+def make_A_batch(kappas):
+    """
+    Make the matrices of the dynamical system for each row of ``kappas``.
+
+    :returns:   The matrices (num_points x d x d) and their derivative with
+                respect to kappa (d x d x s, the same for all points).
+    """
+    dA = make_A(np.zeros(kappas.shape[1]))[1]
+    A = np.einsum('ijr,nr->nij', dA, kappas)
+    return A, dA
+
+
+def _propagators(M, t):
+    """
+    Return ``exp(M t[k])`` for each ``k`` (the time goes to axis -3).
+
+    The exponential of each time step is computed once and the propagators
+    are accumulated, so equally spaced times cost a single exponential.
+    """
+    m = M.shape[-1]
+    P = np.empty(M.shape[:-2] + (t.shape[0], m, m), dtype=M.dtype)
+    E = np.broadcast_to(np.eye(m), M.shape)
+    E = expm(M * t[0]) if t[0] != 0. else E.copy()
+    P[..., 0, :, :] = E
+    step = None
+    for k in range(1, t.shape[0]):
+        dt = t[k] - t[k - 1]
+        if step is None or dt != step[0]:
+            step = (dt, expm(M * dt))
+        E = np.matmul(step[1], E)
+        P[..., k, :, :] = E
+    return P
+
+
+def f_batch(kappas, y0, t):
+    """
+    Evaluate the model at each row of ``kappas``.
+
+    :returns:   The states (num_points x num_times x d).
+    """
+    A = make_A_batch(kappas)[0]
+    return np.einsum('nkij,j->nki', _propagators(A, t), y0)
+
+
+def df_batch(kappas, y0, t):
+    """
+    Evaluate the derivatives of the states with respect to kappa at each row
+    of ``kappas``.
+
+    :returns:   The derivatives (num_points x num_times x d x s).
+    """
+    A, dA = make_A_batch(kappas)
+    n, d = A.shape[:2]
+    s = dA.shape[2]
+    # [[A, dA_r], [0, A]] for each point and parameter
+    M = np.zeros((n, s, 2 * d, 2 * d))
+    M[:, :, :d, :d] = A[:, None]
+    M[:, :, d:, d:] = A[:, None]
+    M[:, :, :d, d:] = np.moveaxis(dA, 2, 0)[None]
+    P = _propagators(M, t)[..., :d, d:]
+    return np.einsum('nrkij,j->nkir', P, y0)
+
+
+def df2_batch(kappas, y0, t):
+    """
+    Evaluate the second derivatives of the states with respect to kappa at
+    each row of ``kappas``.
+
+    :returns:   The second derivatives (num_points x num_times x d x s x s).
+    """
+    A, dA = make_A_batch(kappas)
+    n, d = A.shape[:2]
+    s = dA.shape[2]
+    dA = np.moveaxis(dA, 2, 0)
+    # [[A, dA_r, 0], [0, A, dA_q], [0, 0, A]] for each point and pair
+    M = np.zeros((n, s, s, 3 * d, 3 * d))
+    for b in range(3):
+        M[:, :, :, b * d:(b + 1) * d, b * d:(b + 1) * d] = A[:, None, None]
+    M[:, :, :, :d, d:2 * d] = dA[None, :, None]
+    M[:, :, :, d:2 * d, 2 * d:] = dA[None, None, :]
+    F = _propagators(M, t)[..., :d, 2 * d:]
+    # A is linear in kappa, so the second derivative of exp(A t) is the sum
+    # of the two orderings of the first derivatives
+    F = F + np.swapaxes(F, 1, 2)
+    return np.einsum('nrqkij,j->nkirq', F, y0)
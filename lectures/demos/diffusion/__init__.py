@@ -13,3 +13,4 @@ from ._forward_diffusion import *
 from ._forward_diffusion_left import *
 from ._forward_diffusion_upperleft import *
 from ._forward_diffusion_centers import *
+from ._square_symmetry import *
@@ -17,6 +17,7 @@ from .transport_model import *
 import sys
 from .. import Model
 from .. import view_as_column
+from .. import span
 
 
 class ContaminantTransportModel(Model):
@@ -31,10 +32,11 @@ class ContaminantTransportModel(Model):
         """
         super(ContaminantTransportModel, self).__init__(2, 16, name=name)
 
-    def _eval(self, xs):
+    def _eval(self, xs, order=2):
         """
-        Solves the diffusion equations for u and its derivatives for a given 
-        source location xs. 
+        Solves the diffusion equations for u and its derivatives up to
+        ``order`` for a given source location xs (one PDE solve for u, two
+        more for the first derivatives and three more for the second).
         """
         xs = view_as_column(xs)
         assert xs.shape[0] == 2
@@ -42,20 +44,31 @@ class ContaminantTransportModel(Model):
         ny = nx
         dx = 0.04
         dy = dx
-        mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
-        u = f(xs[:,0], mesh)
-        du1 = df(xs[:,0], mesh, 1)
-        du2 = df(xs[:,0], mesh, 2)
-        d2u11 = df2(xs[:,0], mesh, 1, 1)
-        d2u22 = df2(xs[:,0], mesh, 1, 1)
-        d2u12 = df2(xs[:,0], mesh, 1, 2)
-        dU = np.hstack([view_as_column(du1), view_as_column(du2)])
-        d2U = np.hstack([view_as_column(d2u11), view_as_column(d2u12), view_as_column(d2u12), view_as_column(d2u22)])
-        d2U = d2U.reshape((d2U.shape[0], 2, 2))
+        with span('mesh'):
+            mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
+        with span('solve u'):
+            u = f(xs[:,0], mesh)
         state = {}
         state['f'] = u #view_as_column(u)
-        state['f_grad'] = dU
-        state['f_grad_2'] = d2U
+        state['f_grad'] = None
+        state['f_grad_2'] = None
+        if order >= 1:
+            with span('solve du1'):
+                du1 = df(xs[:,0], mesh, 1)
+            with span('solve du2'):
+                du2 = df(xs[:,0], mesh, 2)
+            dU = np.hstack([view_as_column(du1), view_as_column(du2)])
+            state['f_grad'] = dU
+        if order >= 2:
+            with span('solve d2u11'):
+                d2u11 = df2(xs[:,0], mesh, 1, 1)
+            with span('solve d2u22'):
+                d2u22 = df2(xs[:,0], mesh, 2, 2)
+            with span('solve d2u12'):
+                d2u12 = df2(xs[:,0], mesh, 1, 2)
+            d2U = np.hstack([view_as_column(d2u11), view_as_column(d2u12), view_as_column(d2u12), view_as_column(d2u22)])
+            d2U = d2U.reshape((d2U.shape[0], 2, 2))
+            state['f_grad_2'] = d2U
         return state
     
     def _eval_u(self, xs):
@@ -63,13 +76,5 @@ class ContaminantTransportModel(Model):
         Solves only the diffusion equation for u for a given 
         source location xs. 
         """
-        xs = view_as_column(xs)
-        assert xs.shape[0] == 2
-        nx = 25
-        ny = nx
-        dx = 0.04
-        dy = dx
-        mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
-        u = f(xs[:,0], mesh)
-        return u
+        return self._eval(xs, order=0)['f']
     
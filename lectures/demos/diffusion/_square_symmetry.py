@@ -0,0 +1,102 @@
+"""
+The symmetries of the square domain of the diffusion models.
+
+Date:
+    10/18/2026
+
+"""
+
+
+__all__ = ['SquareSymmetry']
+
+
+import numpy as np
+
+
+class SquareSymmetry(object):
+
+    """
+    The reflections of the square domain with sensors at its corners.
+
+    The domain is ``[0, length] x [0, length]`` and the outputs are the
+    concentrations at the corners, in the order down-left, down-right,
+    up-left, up-right, at ``num_times`` times (as in
+    :class:`vuq.diffusion.ContaminantTransportModel`). The equation, the
+    mesh and the sensors are invariant under the eight symmetries of the
+    square. So, moving the source with one of them just permutes the
+    outputs.
+
+    Calling the object with a source location ``xs`` returns the canonical
+    location (``xs[0] <= xs[1] <= length / 2``) and a function that maps the
+    output of a model at the canonical location (a dictionary like the one of
+    :meth:`vuq.Model._eval()`) to the output at ``xs``. If ``g(x) = A x + b``
+    is the symmetry that maps ``xs`` to the canonical location, the outputs
+    are permuted, the Jacobian is multiplied by ``A`` and the Hessian by
+    ``A`` on both sides. Use it with :class:`vuq.SymmetricCachedFunction`.
+
+    :param length:      The side of the square.
+    :param num_times:   The number of times at which the corners are observed.
+    """
+
+    # The corners in the order of the outputs (in units of length)
+    _CORNERS = np.array([[0., 0.], [1., 0.], [0., 1.], [1., 1.]])
+
+    def __init__(self, length=1., num_times=4):
+        """
+        Initialize the object.
+        """
+        assert length > 0.
+        self._length = length
+        self._num_times = num_times
+
+    def _symmetry(self, xs):
+        """
+        Return ``A`` and ``b`` of the symmetry that maps ``xs`` to the
+        canonical location.
+        """
+        half = 0.5 * self._length
+        A = np.eye(2)
+        b = np.zeros(2)
+        for k in range(2):
+            if xs[k] > half:
+                A[k, k] = -1.
+                b[k] = self._length
+        y = np.dot(A, xs) + b
+        if y[0] > y[1]:
+            A = A[::-1]
+            b = b[::-1]
+        return A, b
+
+    def _permutation(self, A, b):
+        """
+        Return the permutation of the outputs caused by ``g(x) = A x + b``,
+        i.e., output ``k`` at ``xs`` is output ``perm[k]`` at ``g(xs)``.
+        """
+        corners = self._CORNERS * self._length
+        g = np.dot(corners, A.T) + b
+        d = np.abs(g[:, None, :] - corners[None, :, :]).sum(axis=2)
+        sigma = np.argmin(d, axis=1)
+        return (np.arange(self._num_times)[:, None] * 4 + sigma).reshape(-1)
+
+    def __call__(self, xs):
+        """
+        Return the canonical location and the function that restores the
+        outputs.
+        """
+        xs = np.asarray(xs, dtype=float).reshape(-1)
+        assert xs.shape[0] == 2
+        A, b = self._symmetry(xs)
+        perm = self._permutation(A, b)
+
+        def restore(y):
+            out = dict(y)
+            out['f'] = np.asarray(y['f'])[perm]
+            if y.get('f_grad') is not None:
+                out['f_grad'] = np.dot(np.asarray(y['f_grad'])[perm], A)
+            if y.get('f_grad_2') is not None:
+                out['f_grad_2'] = np.einsum('kij,ia,jb->kab',
+                                            np.asarray(y['f_grad_2'])[perm],
+                                            A, A)
+            return out
+
+        return np.dot(A, xs) + b, restore
@@ -10,7 +10,7 @@ Date:
 
 import numpy as np 
 import fipy as fp
-import matplotlib.pyplot as plt 
+from .. import span
 
 
 
@@ -23,9 +23,10 @@ def make_source(xs, mesh, time):
     rho = 0.05
     q0 = 1 / (np.pi * rho ** 2)
     T = 0.3
-    for i in range(sourceTerm().shape[0]):
-        sourceTerm()[i] = q0 * np.exp( - ((mesh.cellCenters[0]()[i] - xs[0]) ** 2
-                                       + (mesh.cellCenters[1]()[i] - xs[1]) ** 2 ) / (2 * rho **2)) * (time() < T)
+    # All cells at once
+    x = mesh.cellCenters.value
+    sourceTerm()[:] = q0 * np.exp( - ((x[0] - xs[0]) ** 2
+                                    + (x[1] - xs[1]) ** 2 ) / (2 * rho **2)) * (time() < T)
     return sourceTerm
 
 def make_source_der(xs, mesh, time, i):
@@ -35,8 +36,8 @@ def make_source_der(xs, mesh, time, i):
     #assert xs.shape[0] == 2
     rho = 0.05
     sourceTerm = make_source(xs, mesh, time)
-    for j in range(sourceTerm().shape[0]):
-        sourceTerm()[j] = sourceTerm()[j] * (mesh.cellCenters[i-1]()[j] - xs[i-1]) / rho ** 2
+    x = mesh.cellCenters.value
+    sourceTerm()[:] *= (x[i-1] - xs[i-1]) / rho ** 2
     return sourceTerm
 
 def make_source_der_2(xs, mesh, time, i, j):
@@ -46,9 +47,9 @@ def make_source_der_2(xs, mesh, time, i, j):
     #assert xs.shape[0] == 2
     rho = 0.05
     sourceTerm = make_source(xs, mesh, time)
-    for k in range(sourceTerm().shape[0]):
-        sourceTerm()[k] = sourceTerm()[k] * ( (mesh.cellCenters[i-1]()[k] - xs[i-1]) * (mesh.cellCenters[j-1]()[k] - xs[j-1]) / rho **2
-                    - (i == j)) / rho **2
+    x = mesh.cellCenters.value
+    sourceTerm()[:] *= ( (x[i-1] - xs[i-1]) * (x[j-1] - xs[j-1]) / rho **2
+                        - (i == j)) / rho **2
     return sourceTerm
 
 def f(xs, mesh):
@@ -66,7 +67,8 @@ def f(xs, mesh):
     y_4(t_4)
     """
     time = fp.Variable()
-    q = make_source(xs, mesh, time)
+    with span('source'):
+        q = make_source(xs, mesh, time)
     D = 1.
     # Define the equation
     eq = fp.TransientTerm() == fp.DiffusionTerm(coeff=D) + q
@@ -79,15 +81,16 @@ def f(xs, mesh):
     dt = 0.005
     steps = 60
     U_sol = []
-    for step in range(steps):
-        eq.solve(var=phi, dt=dt)
-        if step == 14 or step == 29 or step == 44 or  step == 59:
-            #dl = phi()[0]
-            #dr = phi()[24]
-            ul = phi()[600]
-            #ur = phi()[624]
-            #U_sol = np.hstack([U_sol, np.array([dl, dr, ul, ur])])
-            U_sol = np.hstack([U_sol, np.array([ul])])
+    with span('time steps'):
+        for step in range(steps):
+            eq.solve(var=phi, dt=dt)
+            if step == 14 or step == 29 or step == 44 or  step == 59:
+                #dl = phi()[0]
+                #dr = phi()[24]
+                ul = phi()[600]
+                #ur = phi()[624]
+                #U_sol = np.hstack([U_sol, np.array([dl, dr, ul, ur])])
+                U_sol = np.hstack([U_sol, np.array([ul])])
     
     return U_sol
 
@@ -107,7 +110,8 @@ def df(xs, mesh, i):
     """
     assert i == 1 or i == 2
     time = fp.Variable()
-    q0 = make_source_der(xs, mesh, time, i)
+    with span('source'):
+        q0 = make_source_der(xs, mesh, time, i)
     D = 1.
     # Define the equation
     eq = fp.TransientTerm() == fp.DiffusionTerm(coeff=D) + q0
@@ -120,15 +124,16 @@ def df(xs, mesh, i):
     dt = 0.005
     steps = 60
     dU = []
-    for step in range(steps):
-        eq.solve(var=phi, dt=dt)
-        if step == 14 or step == 29 or step == 44 or  step == 59:
-            #dl = phi()[0]
-            #dr = phi()[24]
-            ul = phi()[600]
-            #ur = phi()[624]
-            #dU = np.hstack([dU, np.array([dl, dr, ul, ur])])
-            dU = np.hstack([dU, np.array([ul])])
+    with span('time steps'):
+        for step in range(steps):
+            eq.solve(var=phi, dt=dt)
+            if step == 14 or step == 29 or step == 44 or  step == 59:
+                #dl = phi()[0]
+                #dr = phi()[24]
+                ul = phi()[600]
+                #ur = phi()[624]
+                #dU = np.hstack([dU, np.array([dl, dr, ul, ur])])
+                dU = np.hstack([dU, np.array([ul])])
     
     return dU
 
@@ -152,9 +157,11 @@ def df2(xs, mesh, i, j):
     ny = nx
     dx = 0.04
     dy = dx
-    mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
+    with span('mesh'):
+        mesh = fp.Grid2D(dx=dx, dy=dy, nx=nx, ny=ny)
     time = fp.Variable()
-    q0 = make_source_der_2(xs, mesh, time, i, j)
+    with span('source'):
+        q0 = make_source_der_2(xs, mesh, time, i, j)
     D = 1.
     # Define the equation
     eq = fp.TransientTerm() == fp.DiffusionTerm(coeff=D) + q0
@@ -167,14 +174,15 @@ def df2(xs, mesh, i, j):
     dt = 0.005
     steps = 60
     d2U = []
-    for step in range(steps):
-        eq.solve(var=phi, dt=dt)
-        if step == 14 or step == 29 or step == 44 or  step == 59:
-            #dl = phi()[0]
-            #dr = phi()[24]
-            ul = phi()[600]
-            #ur = phi()[624]
-            #d2U = np.hstack([d2U, np.array([dl, dr, ul, ur])])
-            d2U = np.hstack([d2U, np.array([ul])])
+    with span('time steps'):
+        for step in range(steps):
+            eq.solve(var=phi, dt=dt)
+            if step == 14 or step == 29 or step == 44 or  step == 59:
+                #dl = phi()[0]
+                #dr = phi()[24]
+                ul = phi()[600]
+                #ur = phi()[624]
+                #d2U = np.hstack([d2U, np.array([dl, dr, ul, ur])])
+                d2U = np.hstack([d2U, np.array([ul])])
     
     return d2U
\ No newline at end of file